@@ -0,0 +1,36 @@
+import argparse
+import logging
+import sys
+
+from services import benchmark_service
+
+logging.basicConfig(level=logging.INFO)
+
+logger = logging.getLogger('benchmark')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed runs per stage, the fastest one is reported')
+    parser.add_argument('--corpus', action='append', help='only run the given corpus, can be repeated')
+    parser.add_argument('--baseline', default=benchmark_service.get_baseline_file_path(), help='baseline file to compare with')
+    parser.add_argument('--save-baseline', action='store_true', help='save the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='allowed relative slowdown or memory growth before reporting a regression')
+    args = parser.parse_args()
+
+    results = benchmark_service.run_benchmarks(args.repeat, args.corpus)
+    if args.save_baseline:
+        benchmark_service.save_baseline(args.baseline, results)
+        return
+    baseline = benchmark_service.load_baseline(args.baseline)
+    if baseline is None:
+        logger.info(f'no baseline at {args.baseline}, run with --save-baseline to create one')
+        return
+    regressions = benchmark_service.compare_with_baseline(results, baseline, args.tolerance)
+    if len(regressions) > 0:
+        logger.error(f'{len(regressions)} regressions against {args.baseline}')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,36 +1,131 @@
+import argparse
 import logging
+import multiprocessing
 import os.path
 import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 
 import configs
-from configs import workspace_define
-from services import design_service, font_service, info_service
+from configs import font_define, workspace_define
+from services import coverage_service, design_service, font_service, info_service
+from utils import stage_util
 
-logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger('build')
+
+
+def _setup_logging(verbose):
+    """
+    逐个文件的日志只在详细模式下输出
+    """
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO)
+
+
+def _get_profile_dir(profile):
+    return os.path.join(workspace_define.outputs_dir, 'profiles') if profile else None
+
+
+def _make_px_files(font_config, jobs, verbose, profile, subroutinize):
+    """
+    单个尺寸的构建流程，在独立进程中执行，返回字母表和各阶段的统计记录
+    图片直接使用设计文件绘制，不依赖字体文件，字体编译耗时最长，放在最后执行
+    """
+    _setup_logging(verbose)
+    stage_util.setup(_get_profile_dir(profile))
+    start_time = time.perf_counter()
+    design_index = stage_util.run_stage(f'{font_config.px}px index', design_service.load_px_design_index, font_config)
+    stage_util.run_stage(f'{font_config.px}px classify', design_service.classify_px_design_files, font_config, design_index)
+    stage_util.run_stage(f'{font_config.px}px verify', design_service.verify_px_design_files, font_config, design_index)
+    alphabet, design_file_paths_map = stage_util.run_stage(f'{font_config.px}px collect', design_service.collect_px_design_files, font_config, design_index)
+    stage_util.run_stage(f'{font_config.px}px info', info_service.make_px_info_file, font_config, alphabet)
+    stage_util.run_stage(f'{font_config.px}px preview', info_service.make_px_preview_image_file, font_config, design_file_paths_map)
+    stage_util.run_stage(f'{font_config.px}px alphabet txt', info_service.make_px_alphabet_txt_file, font_config, alphabet)
+    stage_util.run_stage(f'{font_config.px}px alphabet html', info_service.make_px_alphabet_html_file, font_config, alphabet)
+    stage_util.run_stage(f'{font_config.px}px demo html', info_service.make_px_demo_html_file, font_config, alphabet)
+    if font_config.px == 12:
+        _make_shared_images(alphabet, design_file_paths_map)
+    stage_util.run_stage(f'{font_config.px}px fonts', font_service.make_px_fonts, font_config, alphabet, design_file_paths_map, jobs, subroutinize)
+    logger.info(f'{font_config.px}px finished in {time.perf_counter() - start_time:.2f}s')
+    return alphabet, stage_util.get_records()
+
+
+def _create_chain_executor(max_workers):
+    """
+    各尺寸的构建进程使用 spawn 方式启动，minify_html 压缩 CSS 和 JS 时在 fork 出的子进程中会死锁
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _make_shared_images(alphabet, design_file_paths_map):
+    """
+    使用 12px 设计文件绘制的公共图片
+    """
+    stage_util.run_stage('github banner', info_service.make_github_banner, alphabet, design_file_paths_map)
+    stage_util.run_stage('itch.io banner', info_service.make_itch_io_banner, alphabet, design_file_paths_map)
+    stage_util.run_stage('itch.io background', info_service.make_itch_io_background, alphabet, design_file_paths_map)
+    stage_util.run_stage('itch.io cover', info_service.make_itch_io_cover, design_file_paths_map)
+    stage_util.run_stage('afdian cover', info_service.make_afdian_cover, design_file_paths_map)
+
+
+def _make_shared_html_files(font_slices_map):
+    stage_util.run_stage('index html', info_service.make_index_html_file, font_slices_map)
+    stage_util.run_stage('playground html', info_service.make_playground_html_file, font_slices_map)
 
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help='total number of worker processes, shared by the font sizes built in parallel')
+    parser.add_argument('--verbose', action='store_true', help='log every processed file')
+    parser.add_argument('--profile', action='store_true', help='dump cProfile stats of each stage into outputs/profiles')
+    parser.add_argument('--subroutinize', action='store_true', help='subroutinize the CFF table of otf fonts (woff2 is not affected), requires cffsubr')
+    args = parser.parse_args()
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    if args.subroutinize and font_service.cffsubr is None:
+        parser.error('--subroutinize requires the cffsubr package')
+    _setup_logging(args.verbose)
+    stage_util.setup(_get_profile_dir(args.profile))
+    start_time = time.perf_counter()
+
     if os.path.exists(workspace_define.outputs_dir):
         shutil.rmtree(workspace_define.outputs_dir)
     os.makedirs(workspace_define.outputs_dir)
 
-    for font_config in configs.font_configs:
-        design_service.classify_px_design_files(font_config)
-        design_service.verify_px_design_files(font_config)
-        alphabet, design_file_paths_map = design_service.collect_px_design_files(font_config)
-        font_service.make_px_fonts(font_config, alphabet, design_file_paths_map)
-        info_service.make_px_info_file(font_config, alphabet)
-        info_service.make_px_preview_image_file(font_config)
-        info_service.make_px_alphabet_txt_file(font_config, alphabet)
-        info_service.make_px_alphabet_html_file(font_config, alphabet)
-        info_service.make_px_demo_html_file(font_config, alphabet)
-    info_service.make_index_html_file()
-    info_service.make_playground_html_file()
-    info_service.make_github_banner()
-    info_service.make_itch_io_banner()
-    info_service.make_itch_io_background()
-    info_service.make_itch_io_cover()
-    info_service.make_afdian_cover()
+    # 字符集缓存各尺寸共用，先在主进程中建立
+    stage_util.run_stage('charset tables', coverage_service.make_charset_cache_files)
+
+    # 各尺寸的构建流程互不依赖，分别在独立进程中并行执行，--jobs 为进程总数，平均分配给各尺寸生成轮廓
+    chain_count = min(args.jobs, len(configs.font_configs))
+    chain_jobs = max(1, args.jobs // len(configs.font_configs))
+    font_slices_map = {}
+    with _create_chain_executor(chain_count) as executor:
+        futures = {executor.submit(_make_px_files, font_config, chain_jobs, args.verbose, args.profile, args.subroutinize): font_config for font_config in configs.font_configs}
+        pending_futures = set(futures.keys())
+        while len(pending_futures) > 0:
+            done_futures, pending_futures = wait(pending_futures, return_when=FIRST_COMPLETED)
+            for future in done_futures:
+                font_config = futures[future]
+                if future.exception() is not None:
+                    logger.error(f'{font_config.px}px failed, waiting for running builds to stop')
+                    for pending_future in pending_futures:
+                        pending_future.cancel()
+                    raise future.exception()
+                alphabet, records = future.result()
+                font_slices_map[font_config.px] = font_service.get_font_slices(alphabet)
+                stage_util.merge_records(records)
+
+    # 公共网页需要全部尺寸的字体分片
+    _make_shared_html_files(font_slices_map)
+
+    # 构建报告记录各阶段的耗时、CPU 时间、内存峰值和处理数量
+    stage_util.save_report(
+        os.path.join(workspace_define.outputs_dir, 'build-report.json'),
+        version=font_define.version,
+        jobs=args.jobs,
+        chain_jobs=chain_jobs,
+        subroutinize=args.subroutinize,
+        wall_time=time.perf_counter() - start_time,
+    )
 
 
 if __name__ == '__main__':
@@ -3,9 +3,10 @@ import os.path
 from jinja2 import Environment, FileSystemLoader
 
 from configs import workspace_define
+from configs.charset_config import CharsetConfig
 from configs.font_define import FontConfig
 from configs.git_deploy_config import GitDeployConfig
-from utils import unicode_util
+from utils import unicode_util, html_util, gb2312_util, big5_util, shift_jis_util, ks_x_1001_util
 
 font_configs = [
     FontConfig(10, 9),
@@ -29,7 +30,35 @@ design_dirs = [workspace_define.design_dir]
 
 unicode_blocks = unicode_util.load_blocks_db(os.path.join(workspace_define.unidata_dir, 'blocks.txt'))
 
+unicode_block_index = unicode_util.UnicodeBlockIndex(unicode_blocks)
+
+# 参考字符集，新增字符集只需提供区块查询函数并在此登记
+charset_configs = [
+    CharsetConfig('gb2312', 'GB2312', '简体中文参考字符集。统计范围不包含 ASCII。', gb2312_util.query_block, [
+        ('level-1', '一级汉字', gb2312_util.alphabet_level_1_count),
+        ('level-2', '二级汉字', gb2312_util.alphabet_level_2_count),
+        ('other', '其他字符', gb2312_util.alphabet_other_count),
+    ]),
+    CharsetConfig('big5', 'Big5', '繁体中文参考字符集。统计范围不包含 ASCII。', big5_util.query_block, [
+        ('level-1', '常用汉字', big5_util.alphabet_level_1_count),
+        ('level-2', '次常用汉字', big5_util.alphabet_level_2_count),
+        ('other', '标点符号、希腊字母、特殊符号，九个计量用汉字', big5_util.alphabet_other_count),
+    ]),
+    CharsetConfig('shift-jis', 'Shift-JIS', '日语参考字符集。', shift_jis_util.query_block, [
+        ('single-ascii', '单字节-ASCII字符', shift_jis_util.alphabet_single_ascii_count),
+        ('single-other', '单字节-半角标点和片假名', shift_jis_util.alphabet_single_other_count),
+        ('double-basic', '双字节-假名和其他字符', shift_jis_util.alphabet_double_basic_count),
+        ('double-word', '双字节-汉字', shift_jis_util.alphabet_double_word_count),
+    ]),
+    CharsetConfig('ks-x-1001', 'KS X 1001', '韩语参考字符集。统计范围不包含 ASCII。', ks_x_1001_util.query_block, [
+        ('syllable', '谚文音节', ks_x_1001_util.alphabet_syllable_count),
+        ('word', '汉字', ks_x_1001_util.alphabet_word_count),
+        ('other', '其他字符', ks_x_1001_util.alphabet_other_count),
+    ]),
+]
+
 template_env = Environment(loader=FileSystemLoader(workspace_define.templates_dir))
+template_env.filters['tag_notdef'] = html_util.tag_notdef
 
 git_deploy_configs = [GitDeployConfig(
     'git@github.com:TakWolf/ark-pixel-font.git',
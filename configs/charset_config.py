@@ -0,0 +1,11 @@
+class CharsetConfig:
+    def __init__(self, name, display_name, description, query_block_func, blocks):
+        """
+        blocks 为区块定义列表，元素为 (区块标识, 区块标题, 区块字符总数)，按照表格中的顺序排列
+        """
+        self.name = name
+        self.display_name = display_name
+        self.description = description
+        self.query_block_func = query_block_func
+        self.blocks = blocks
+        self.char_count = sum(block_char_count for _, _, block_char_count in blocks)
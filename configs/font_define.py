@@ -27,6 +27,7 @@ class FontConfig:
         self.em_dot_size = em_dot_size
         # 附加文件清单
         self.info_file_name = f'font-info-{px}px.md'
+        self.info_json_file_name = f'font-info-{px}px.json'
         self.preview_image_file_name = f'preview-{px}px.png'
         self.alphabet_txt_file_name = f'alphabet-{px}px.txt'
         self.alphabet_html_file_name = f'alphabet-{px}px.html'
@@ -47,5 +48,8 @@ class FontConfig:
     def get_output_font_file_name(self, language_specific, font_format):
         return f'{output_name}-{self.px}px-{language_specific}.{font_format}'
 
+    def get_output_font_slice_file_name(self, language_specific, slice_index):
+        return f'{output_name}-{self.px}px-{language_specific}-slice-{slice_index}.woff2'
+
     def get_release_zip_file_name(self, font_format):
         return f'{output_name}-font-{self.px}px-{font_format}-v{version}.zip'
@@ -16,3 +16,6 @@ releases_dir = os.path.join(project_root_dir, 'releases')
 docs_dir = os.path.join(project_root_dir, 'docs')
 
 www_dir = os.path.join(project_root_dir, 'www')
+
+cache_dir = os.path.join(project_root_dir, 'cache')
+glyph_cache_dir = os.path.join(cache_dir, 'glyphs')
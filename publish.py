@@ -1,6 +1,8 @@
+import argparse
 import logging
 import os.path
 import shutil
+import zipfile
 
 import configs
 from configs import workspace_define
@@ -8,8 +10,22 @@ from services import publish_service
 
 logging.basicConfig(level=logging.DEBUG)
 
+_zip_compressions = {
+    'stored': zipfile.ZIP_STORED,
+    'deflated': zipfile.ZIP_DEFLATED,
+    'bzip2': zipfile.ZIP_BZIP2,
+    'lzma': zipfile.ZIP_LZMA,
+}
+
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--zip-compression', choices=_zip_compressions.keys(), default='deflated', help='compression method of release zips')
+    parser.add_argument('--zip-level', type=int, default=9, help='compression level of release zips')
+    parser.add_argument('--jobs', type=int, default=None, help='number of threads used to make release zips')
+    parser.add_argument('--deploy-mode', choices=['force', 'incremental', 'skip'], default='force', help='force-push a fresh repository, commit on top of the existing pages branch, or skip deploying')
+    args = parser.parse_args()
+
     if os.path.exists(workspace_define.releases_dir):
         shutil.rmtree(workspace_define.releases_dir)
     os.makedirs(workspace_define.releases_dir)
@@ -17,17 +33,15 @@ def main():
     if not os.path.exists(workspace_define.docs_dir):
         os.makedirs(workspace_define.docs_dir)
 
-    if os.path.exists(workspace_define.www_dir):
-        shutil.rmtree(workspace_define.www_dir)
-    shutil.copytree(workspace_define.www_static_dir, workspace_define.www_dir)
-
+    publish_service.make_release_zips(_zip_compressions[args.zip_compression], args.zip_level, args.jobs)
     for font_config in configs.font_configs:
-        publish_service.make_px_release_zips(font_config)
         publish_service.copy_px_docs_files(font_config)
-        publish_service.copy_px_www_files(font_config)
     publish_service.copy_docs_files()
-    publish_service.copy_www_files()
-    publish_service.deploy_www()
+    publish_service.stage_www_files()
+    if args.deploy_mode == 'force':
+        publish_service.deploy_www()
+    elif args.deploy_mode == 'incremental':
+        publish_service.deploy_www_incremental()
 
 
 if __name__ == '__main__':
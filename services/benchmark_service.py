@@ -0,0 +1,226 @@
+import io
+import json
+import logging
+import os
+import pickle
+import time
+import tracemalloc
+
+import numpy as np
+
+import configs
+from configs import font_define, workspace_define
+from services import design_service, font_service
+from utils import glyph_util
+
+logger = logging.getLogger('benchmark-service')
+
+# 语料字形数量不足时重复填充，避免计时过短
+_min_corpus_size = 64
+_dense_cjk_corpus_size = 256
+
+
+class _Corpus:
+    def __init__(self, group, name, units_per_em, ascent, descent, origin_y_px, em_dot_size, design_file_bytes_list):
+        self.group = group
+        self.name = name
+        self.px = units_per_em // em_dot_size
+        self.units_per_em = units_per_em
+        self.ascent = ascent
+        self.descent = descent
+        self.origin_y_px = origin_y_px
+        self.em_dot_size = em_dot_size
+        self.design_file_bytes_list = list(design_file_bytes_list)
+        while 0 < len(self.design_file_bytes_list) < _min_corpus_size:
+            self.design_file_bytes_list.extend(self.design_file_bytes_list[:_min_corpus_size - len(self.design_file_bytes_list)])
+
+
+def _read_design_files(design_file_paths):
+    design_file_bytes_list = []
+    for design_file_path in design_file_paths:
+        with open(design_file_path, 'rb') as file:
+            design_file_bytes_list.append(file.read())
+    return design_file_bytes_list
+
+
+def _make_checkerboard_design_data(size, cell_size, phase):
+    ys, xs = np.indices((size, size))
+    return (ys // cell_size + xs // cell_size + phase) % 2 == 0
+
+
+def _make_stress_design_data_list(size):
+    """
+    大尺寸合成字形：随机噪点、同心方环和对角线条纹，固定随机种子保证可重复
+    """
+    design_data_list = []
+    for seed in range(8):
+        random_state = np.random.RandomState(seed)
+        design_data_list.append(random_state.random_sample((size, size)) < 0.5)
+    ys, xs = np.indices((size, size))
+    for offset in range(4):
+        distance = np.maximum(np.abs(ys - size // 2), np.abs(xs - size // 2))
+        design_data_list.append((distance + offset) % 3 == 0)
+    for step in range(2, 6):
+        design_data_list.append((ys + xs) % step == 0)
+    return design_data_list
+
+
+def _load_corpora():
+    corpora = []
+    for font_config in configs.font_configs:
+        group = f'{font_config.px}px'
+        units_per_em, ascent, descent = font_config.get_metrics()
+        alphabet, design_file_paths_map = design_service.collect_px_design_files(font_config)
+        design_file_paths = design_file_paths_map['latin']
+
+        def make_corpus(name, design_file_bytes_list):
+            return _Corpus(group, name, units_per_em, ascent, descent, font_config.origin_y_px, font_config.em_dot_size, design_file_bytes_list)
+
+        corpora.append(make_corpus('ascii', _read_design_files(design_file_paths[code_point] for code_point in range(0x21, 0x7E + 1) if code_point in design_file_paths)))
+        # 按照笔画像素数量选取最密集的汉字
+        cjk_design_file_paths = [design_file_paths_map['zh_cn'][code_point] for code_point in sorted(code_point for code_point in design_file_paths_map['zh_cn'] if code_point != '.notdef' and 0x4E00 <= code_point <= 0x9FFF)]
+        cjk_design_file_bytes_list = _read_design_files(cjk_design_file_paths)
+        cjk_design_file_bytes_list.sort(key=lambda data: -int(glyph_util.decode_design_data_from_png(data)[0].sum()))
+        corpora.append(make_corpus('dense-cjk', cjk_design_file_bytes_list[:_dense_cjk_corpus_size]))
+        corpora.append(make_corpus('box-drawing', _read_design_files(design_file_paths[code_point] for code_point in range(0x2500, 0x257F + 1) if code_point in design_file_paths)))
+        corpora.append(make_corpus('checkerboard', [glyph_util.encode_design_data_to_png(_make_checkerboard_design_data(font_config.px, cell_size, phase)) for cell_size in (1, 2) for phase in (0, 1)]))
+    for size in (32, 64):
+        em_dot_size = 100
+        units_per_em = size * em_dot_size
+        origin_y_px = size * 3 // 4
+        corpora.append(_Corpus('synthetic', f'stress-{size}px', units_per_em, origin_y_px * em_dot_size, (origin_y_px - size) * em_dot_size, origin_y_px, em_dot_size, [glyph_util.encode_design_data_to_png(design_data) for design_data in _make_stress_design_data_list(size)]))
+    return corpora
+
+
+def _build_font(corpus, glyph_infos, is_ttf, flavor=None):
+    """
+    构建字体，返回文件大小
+    """
+    glyph_order = ['.notdef']
+    character_map = {}
+    glyph_info_map = {'.notdef': glyph_infos[0]}
+    for i, glyph_info in enumerate(glyph_infos):
+        code_point = 0xE000 + i
+        glyph_name = font_service._get_glyph_name(code_point)
+        glyph_order.append(glyph_name)
+        character_map[code_point] = glyph_name
+        glyph_info_map[glyph_name] = glyph_info
+    name_strings = {
+        'familyName': f'{font_define.display_name} Benchmark',
+        'styleName': font_define.style_name,
+        'fullName': f'{font_define.display_name} Benchmark',
+        'psName': f'{font_define.unique_name}-Benchmark-{font_define.style_name}',
+        'version': font_define.version,
+    }
+    builder = font_service._create_font_builder(name_strings, corpus.units_per_em, corpus.ascent, corpus.descent, glyph_order, character_map, glyph_info_map, is_ttf)
+    builder.font.flavor = flavor
+    buffer = io.BytesIO()
+    builder.save(buffer)
+    return len(buffer.getvalue())
+
+
+def _get_stages(corpus):
+    """
+    各阶段为 (名称, 准备函数, 计时函数)，准备函数的开销不计入结果
+    """
+    design_data_list = [glyph_util.decode_design_data_from_png(data) for data in corpus.design_file_bytes_list]
+    outlines_list = [(glyph_util.get_outlines_from_design_data(design_data, corpus.em_dot_size), width) for design_data, width, _ in design_data_list]
+    otf_glyph_infos_data = pickle.dumps([font_service._draw_glyph(outlines, width, corpus.px, corpus.origin_y_px, corpus.em_dot_size, False) for outlines, width in outlines_list])
+    ttf_glyph_infos_data = pickle.dumps([font_service._draw_glyph(outlines, width, corpus.px, corpus.origin_y_px, corpus.em_dot_size, True) for outlines, width in outlines_list])
+    return [
+        ('decode png', lambda: corpus.design_file_bytes_list, lambda data_list: [glyph_util.decode_design_data_from_png(data) for data in data_list]),
+        ('outlines', lambda: design_data_list, lambda items: [glyph_util.get_outlines_from_design_data(design_data, corpus.em_dot_size) for design_data, _, _ in items]),
+        ('draw otf', lambda: outlines_list, lambda items: [font_service._draw_glyph(outlines, width, corpus.px, corpus.origin_y_px, corpus.em_dot_size, False) for outlines, width in items]),
+        ('draw ttf', lambda: outlines_list, lambda items: [font_service._draw_glyph(outlines, width, corpus.px, corpus.origin_y_px, corpus.em_dot_size, True) for outlines, width in items]),
+        # 字形对象会缓存编译结果，每次计时前重新反序列化
+        ('compile otf', lambda: pickle.loads(otf_glyph_infos_data), lambda glyph_infos: _build_font(corpus, glyph_infos, False)),
+        ('compile woff2', lambda: pickle.loads(otf_glyph_infos_data), lambda glyph_infos: _build_font(corpus, glyph_infos, False, 'woff2')),
+        ('compile ttf', lambda: pickle.loads(ttf_glyph_infos_data), lambda glyph_infos: _build_font(corpus, glyph_infos, True)),
+    ]
+
+
+def _measure(setup, func, repeat):
+    """
+    返回多次运行中的最短耗时，单独运行一次时的内存分配峰值，以及该次运行的返回值
+    """
+    best_time = None
+    for _ in range(repeat):
+        args = setup()
+        start_time = time.perf_counter()
+        func(args)
+        elapsed_time = time.perf_counter() - start_time
+        if best_time is None or elapsed_time < best_time:
+            best_time = elapsed_time
+    args = setup()
+    tracemalloc.start()
+    result = func(args)
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best_time, peak_memory, result
+
+
+def run_benchmarks(repeat=3, corpus_names=None):
+    """
+    运行全部语料的各个阶段，返回结果映射，键为 '分组/语料/阶段'
+    """
+    results = {}
+    for corpus in _load_corpora():
+        if corpus_names is not None and corpus.name not in corpus_names:
+            continue
+        glyph_count = len(corpus.design_file_bytes_list)
+        for stage_name, setup, func in _get_stages(corpus):
+            best_time, peak_memory, result = _measure(setup, func, repeat)
+            key = f'{corpus.group}/{corpus.name}/{stage_name}'
+            results[key] = {
+                'glyphs': glyph_count,
+                'seconds': best_time,
+                'glyphs_per_second': glyph_count / best_time,
+                'peak_memory': peak_memory,
+            }
+            message = f'{key}: {glyph_count / best_time:.0f} glyphs/s, peak {peak_memory / 1024:.0f} KiB'
+            # 编译阶段同时记录字体文件大小
+            if isinstance(result, int):
+                results[key]['output_bytes'] = result
+                message += f', {result} bytes'
+            logger.info(message)
+    return results
+
+
+def get_baseline_file_path():
+    return os.path.join(workspace_define.cache_dir, 'benchmark-baseline.json')
+
+
+def load_baseline(file_path):
+    if not os.path.isfile(file_path):
+        return None
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_baseline(file_path, results):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+        file.write('\n')
+    logger.info(f'make {file_path}')
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """
+    对比基准结果，吞吐量下降、内存峰值或文件大小上升超过容差时视为退化，返回退化项列表
+    """
+    regressions = []
+    for key, result in results.items():
+        baseline_result = baseline.get(key)
+        if baseline_result is None:
+            continue
+        speed_ratio = result['glyphs_per_second'] / baseline_result['glyphs_per_second']
+        memory_ratio = result['peak_memory'] / baseline_result['peak_memory'] if baseline_result['peak_memory'] > 0 else 1
+        size_ratio = result['output_bytes'] / baseline_result['output_bytes'] if 'output_bytes' in result and 'output_bytes' in baseline_result else 1
+        message = f'{key}: speed {speed_ratio:.2f}x, memory {memory_ratio:.2f}x, size {size_ratio:.2f}x'
+        if speed_ratio < 1 - tolerance or memory_ratio > 1 + tolerance or size_ratio > 1 + tolerance:
+            logger.warning(f'regression {message}')
+            regressions.append(key)
+        else:
+            logger.info(message)
+    return regressions
@@ -0,0 +1,102 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import platform
+
+import configs
+from configs import workspace_define
+from utils import charset_util
+
+logger = logging.getLogger('coverage-service')
+
+_charset_cache_version = 1
+_code_point_map = None
+
+
+def _get_charset_cache_file_path(charset_config):
+    return os.path.join(workspace_define.cache_dir, 'charsets', f'{charset_config.name}.json')
+
+
+def _get_charset_config_hash(charset_config):
+    """
+    字符集配置的摘要，包含区块定义和区块查询函数所在模块及遍历函数的源码，修改后缓存失效
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((charset_config.name, charset_config.blocks)).encode('utf-8'))
+    for source_file_path in (inspect.getsourcefile(charset_config.query_block_func), inspect.getsourcefile(charset_util)):
+        with open(source_file_path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def _load_charset_code_points_map(charset_config):
+    """
+    加载字符集区块到码位列表的映射，编码表随解释器版本变化，解释器版本或字符集配置不一致时重新建立
+    每个字符集单独缓存，新增字符集时只需遍历新的字符集
+    """
+    cache_file_path = _get_charset_cache_file_path(charset_config)
+    config_hash = _get_charset_config_hash(charset_config)
+    if os.path.isfile(cache_file_path):
+        try:
+            with open(cache_file_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('version') == _charset_cache_version and data.get('python') == platform.python_version() and data.get('config') == config_hash:
+                return data['blocks']
+        except (OSError, ValueError):
+            logger.warning(f'ignore broken charset cache {cache_file_path}')
+    code_points_map = charset_util.build_code_points_map(charset_config.query_block_func)
+    os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+    # 单独调用 get_coverage_infos 时各进程可能同时建立缓存，临时文件按进程区分
+    cache_file_tmp_path = f'{cache_file_path}.{os.getpid()}.tmp'
+    with open(cache_file_tmp_path, 'w', encoding='utf-8') as file:
+        json.dump({'version': _charset_cache_version, 'python': platform.python_version(), 'config': config_hash, 'blocks': code_points_map}, file, separators=(',', ':'), sort_keys=True)
+    os.replace(cache_file_tmp_path, cache_file_path)
+    logger.info(f'make {cache_file_path}')
+    return code_points_map
+
+
+def make_charset_cache_files():
+    """
+    建立缺失或过期的字符集缓存，在启动各尺寸的构建进程之前调用，避免各进程重复遍历编码表
+    """
+    for charset_config in configs.charset_configs:
+        _load_charset_code_points_map(charset_config)
+
+
+def _load_code_point_map():
+    """
+    合并全部字符集，建立码位到 (字符集序号, 区块标识) 列表的映射
+    """
+    global _code_point_map
+    if _code_point_map is None:
+        code_point_map = {}
+        for i, charset_config in enumerate(configs.charset_configs):
+            for block_name, code_points in _load_charset_code_points_map(charset_config).items():
+                for code_point in code_points:
+                    code_point_map.setdefault(code_point, []).append((i, block_name))
+        _code_point_map = code_point_map
+    return _code_point_map
+
+
+def get_coverage_infos(alphabet):
+    """
+    Unicode 区块和全部参考字符集在排序后的字母表的单次遍历中同时统计
+    返回 Unicode 区块信息列表 [(区块, 覆盖数)] 和字符集信息列表 [(字符集配置, [(区块标识, 区块标题, 覆盖数, 字符总数)])]，字符集信息最后一行为总计
+    """
+    code_point_map = _load_code_point_map()
+    charset_count_maps = [{} for _ in configs.charset_configs]
+
+    def count_charsets(code_point):
+        for i, block_name in code_point_map.get(code_point, ()):
+            charset_count_map = charset_count_maps[i]
+            charset_count_map[block_name] = charset_count_map.get(block_name, 0) + 1
+
+    unicode_infos = [(configs.unicode_blocks[position], count) for position, count in configs.unicode_block_index.count_alphabet(alphabet, count_charsets).items()]
+    charset_infos = []
+    for charset_config, charset_count_map in zip(configs.charset_configs, charset_count_maps):
+        block_infos = [(block_name, block_title, charset_count_map.get(block_name, 0), block_char_count) for block_name, block_title, block_char_count in charset_config.blocks]
+        block_infos.append(('total', '总计', sum(charset_count_map.values()), charset_config.char_count))
+        charset_infos.append((charset_config, block_infos))
+    return unicode_infos, charset_infos
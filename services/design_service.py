@@ -1,13 +1,24 @@
+import collections
+import hashlib
+import json
 import logging
 import os.path
-import shutil
+import time
 import unicodedata
 
 import configs
-from utils import glyph_util, unicode_util
+from configs import workspace_define
+from utils import glyph_util, stage_util
 
 logger = logging.getLogger('design-service')
 
+# 校验规则变更时需要递增，使旧的校验清单失效
+_verify_manifest_version = 2
+# 文件名规则变更时需要递增，使旧的设计文件索引失效
+_design_index_version = 2
+# 修改时间距扫描时刻过近的目录或文件，同一时间精度内的后续修改无法察觉，下次需要重新列出或校验
+_racy_mtime_ns = 2 * 1000 * 1000 * 1000
+
 
 def _parse_design_file_name(design_file_name):
     """
@@ -27,124 +38,323 @@ def _parse_design_file_name(design_file_name):
     return uni_hex_name, language_specifics
 
 
-def classify_px_design_files(font_config):
+def _get_classified_design_file_path(design_flavor_dir, uni_hex_name, language_specifics):
+    """
+    计算设计文件按照 Unicode 区块分类后应在的位置
+    """
+    if uni_hex_name == 'notdef':
+        design_file_to_dir = design_flavor_dir
+    else:
+        code_point = int(uni_hex_name, 16)
+        unicode_block = configs.unicode_block_index.index_block(code_point)[1]
+        block_dir_name = f'{unicode_block.begin:04X}-{unicode_block.end:04X} {unicode_block.name}'
+        design_file_to_dir = os.path.join(design_flavor_dir, block_dir_name)
+        if unicode_block.name == 'CJK Unified Ideographs':
+            design_file_to_dir = os.path.join(design_file_to_dir, f'{uni_hex_name[0:-2]}-')
+    design_file_name = f'{uni_hex_name}{" " if len(language_specifics) > 0 else ""}{",".join(language_specifics)}.png'
+    return os.path.join(design_file_to_dir, design_file_name)
+
+
+DesignFileRecord = collections.namedtuple('DesignFileRecord', ['path', 'flavor_dir', 'uni_hex_name', 'code_point', 'language_specifics', 'size', 'mtime'])
+
+
+class DesignIndex:
+    """
+    单个尺寸的设计文件索引，分类、校验和收集共用
+    按照目录保存修改时间和解析后的文件列表，目录未变化时不重新列出，只更新文件的大小和修改时间
+    目录以相对路径记录，外层为相对于项目根目录的风格目录，内层为相对于风格目录的子目录，索引文件与检出位置无关
+    """
+    def __init__(self, font_config, dirs=None):
+        self.font_config = font_config
+        self.flavor_dirs = [os.path.join(design_dir, f'{font_config.px}') for design_dir in configs.design_dirs]
+        self.flavor_dirs = [design_flavor_dir for design_flavor_dir in self.flavor_dirs if os.path.isdir(design_flavor_dir)]
+        self.dirs = dirs if dirs is not None else {}
+        self.records = []
+
+    @staticmethod
+    def _scan_dir(dir_path, mtime):
+        sub_dir_names = []
+        file_infos = []
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    sub_dir_names.append(entry.name)
+                elif entry.name.endswith('.png'):
+                    uni_hex_name, language_specifics = _parse_design_file_name(entry.name)
+                    file_infos.append([entry.name, uni_hex_name, language_specifics])
+        sub_dir_names.sort()
+        file_infos.sort()
+        if time.time_ns() - mtime < _racy_mtime_ns:
+            mtime = None
+        return {'mtime': mtime, 'dirs': sub_dir_names, 'files': file_infos}
+
+    def refresh(self):
+        """
+        更新索引，只重新列出修改时间有变化的目录，返回重新列出的目录数量
+        """
+        dirs = {}
+        records = []
+        scanned_dir_count = 0
+        for design_flavor_dir in self.flavor_dirs:
+            design_flavor_key = os.path.relpath(design_flavor_dir, workspace_define.project_root_dir).replace(os.sep, '/')
+            last_flavor_dirs = self.dirs.get(design_flavor_key, {})
+            flavor_dirs = dirs[design_flavor_key] = {}
+            pending_dir_paths = [design_flavor_dir]
+            while len(pending_dir_paths) > 0:
+                dir_path = pending_dir_paths.pop()
+                dir_key = os.path.relpath(dir_path, design_flavor_dir).replace(os.sep, '/')
+                # 先读取修改时间再列出，列出期间发生的修改会在下次更新时发现
+                mtime = os.stat(dir_path).st_mtime_ns
+                dir_info = last_flavor_dirs.get(dir_key)
+                if dir_info is None or dir_info['mtime'] != mtime:
+                    dir_info = self._scan_dir(dir_path, mtime)
+                    scanned_dir_count += 1
+                flavor_dirs[dir_key] = dir_info
+                for file_name, uni_hex_name, language_specifics in dir_info['files']:
+                    design_file_path = os.path.join(dir_path, file_name)
+                    # 原地修改文件不会改变目录的修改时间，文件状态总是重新读取
+                    design_file_stat = os.stat(design_file_path)
+                    code_point = None if uni_hex_name == 'notdef' else int(uni_hex_name, 16)
+                    records.append(DesignFileRecord(design_file_path, design_flavor_dir, uni_hex_name, code_point, tuple(language_specifics), design_file_stat.st_size, design_file_stat.st_mtime_ns))
+                pending_dir_paths.extend(os.path.join(dir_path, sub_dir_name) for sub_dir_name in reversed(dir_info['dirs']))
+        self.dirs = dirs
+        self.records = records
+        return scanned_dir_count
+
+
+def _get_design_index_file_path(font_config):
+    return os.path.join(workspace_define.cache_dir, f'design-index-{font_config.px}px.json')
+
+
+def _save_design_index(design_index):
+    index_file_path = _get_design_index_file_path(design_index.font_config)
+    if not os.path.exists(workspace_define.cache_dir):
+        os.makedirs(workspace_define.cache_dir)
+    index_file_tmp_path = f'{index_file_path}.tmp'
+    with open(index_file_tmp_path, 'w', encoding='utf-8') as file:
+        json.dump({'version': _design_index_version, 'dirs': design_index.dirs}, file, separators=(',', ':'), sort_keys=True)
+    os.replace(index_file_tmp_path, index_file_path)
+
+
+def load_px_design_index(font_config):
+    """
+    加载上次保存的设计文件索引并增量更新
+    """
+    dirs = None
+    index_file_path = _get_design_index_file_path(font_config)
+    if os.path.isfile(index_file_path):
+        try:
+            with open(index_file_path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            if data.get('version') == _design_index_version:
+                dirs = data['dirs']
+        except (OSError, ValueError):
+            logger.warning(f'ignore broken design index {index_file_path}')
+    design_index = DesignIndex(font_config, dirs)
+    scanned_dir_count = design_index.refresh()
+    _save_design_index(design_index)
+    stage_util.add_count('design_files', len(design_index.records))
+    stage_util.add_count('scanned_dirs', scanned_dir_count)
+    logger.info(f'index {font_config.px}px design files: {len(design_index.records)} files, {scanned_dir_count} of {sum(len(flavor_dirs) for flavor_dirs in design_index.dirs.values())} dirs scanned')
+    return design_index
+
+
+def classify_px_design_files(font_config, design_index=None, dry_run=False):
     """
     按照 Unicode 区块分类设计文件
+    只移动位置不正确的文件，每次移动都是原子的重命名，中断后再次执行即可继续
+    返回需要移动的文件列表，dry_run 为 True 时只报告，不做任何修改
     """
-    for design_dir in configs.design_dirs:
-        design_flavor_dir = os.path.join(design_dir, f'{font_config.px}')
-        if not os.path.isdir(design_flavor_dir):
-            continue
-        design_flavor_tmp_dir = os.path.join(design_dir, f'{font_config.px}.tmp')
-        os.rename(design_flavor_dir, design_flavor_tmp_dir)
-        os.mkdir(design_flavor_dir)
-        for design_file_parent_dir, _, design_file_names in os.walk(design_flavor_tmp_dir):
-            for design_file_name in design_file_names:
-                if not design_file_name.endswith('.png'):
-                    continue
-                design_file_from_path = os.path.join(design_file_parent_dir, design_file_name)
-                uni_hex_name, language_specifics = _parse_design_file_name(design_file_name)
-                if uni_hex_name == 'notdef':
-                    design_file_to_dir = design_flavor_dir
-                else:
-                    code_point = int(uni_hex_name, 16)
-                    unicode_block = unicode_util.index_block_by_code_point(configs.unicode_blocks, code_point)[1]
-                    block_dir_name = f'{unicode_block.begin:04X}-{unicode_block.end:04X} {unicode_block.name}'
-                    design_file_to_dir = os.path.join(design_flavor_dir, block_dir_name)
-                    if unicode_block.name == 'CJK Unified Ideographs':
-                        design_file_to_dir = os.path.join(design_file_to_dir, f'{uni_hex_name[0:-2]}-')
-                    if not os.path.exists(design_file_to_dir):
-                        os.makedirs(design_file_to_dir)
-                design_file_name = f'{uni_hex_name}{" " if len(language_specifics) > 0 else ""}{",".join(language_specifics)}.png'
-                design_file_to_path = os.path.join(design_file_to_dir, design_file_name)
-                assert not os.path.exists(design_file_to_path), design_file_from_path
-                shutil.move(design_file_from_path, design_file_to_path)
-                logger.info(f'classify design file: {design_file_to_path}')
-        shutil.rmtree(design_flavor_tmp_dir)
-
-
-def verify_px_design_files(font_config):
+    if design_index is None:
+        design_index = load_px_design_index(font_config)
+    moves = []
+    for design_flavor_dir in design_index.flavor_dirs:
+        design_flavor_moves = []
+        for record in design_index.records:
+            if record.flavor_dir != design_flavor_dir:
+                continue
+            design_file_to_path = _get_classified_design_file_path(design_flavor_dir, record.uni_hex_name, record.language_specifics)
+            if record.path != design_file_to_path:
+                design_flavor_moves.append((record.path, design_file_to_path))
+        # 移动前先检查冲突，避免移动到一半才失败
+        design_file_to_paths = set()
+        for design_file_from_path, design_file_to_path in design_flavor_moves:
+            assert design_file_to_path not in design_file_to_paths, design_file_from_path
+            design_file_to_paths.add(design_file_to_path)
+            # 大小写不敏感的文件系统中，只修改大小写时目标路径就是文件本身
+            assert not os.path.exists(design_file_to_path) or os.path.samefile(design_file_from_path, design_file_to_path), design_file_from_path
+        for design_file_from_path, design_file_to_path in design_flavor_moves:
+            if dry_run:
+                logger.info(f'classify design file (dry run): {design_file_from_path} -> {design_file_to_path}')
+                continue
+            design_file_to_dir = os.path.dirname(design_file_to_path)
+            if not os.path.exists(design_file_to_dir):
+                os.makedirs(design_file_to_dir)
+            os.rename(design_file_from_path, design_file_to_path)
+            logger.info(f'classify design file: {design_file_to_path}')
+        # 清理空目录
+        if not dry_run and len(design_flavor_moves) > 0:
+            for design_file_parent_dir, _, _ in os.walk(design_flavor_dir, topdown=False):
+                if design_file_parent_dir != design_flavor_dir and len(os.listdir(design_file_parent_dir)) == 0:
+                    os.rmdir(design_file_parent_dir)
+        moves.extend(design_flavor_moves)
+    # 移动过的目录修改时间已变化，更新索引时只会重新列出这些目录
+    if not dry_run and len(moves) > 0:
+        design_index.refresh()
+        _save_design_index(design_index)
+    stage_util.add_count('moved_files', len(moves))
+    logger.info(f'classify {font_config.px}px design files: {len(moves)} misplaced')
+    return moves
+
+
+def _get_verify_manifest_file_path(font_config):
+    return os.path.join(workspace_define.cache_dir, f'verify-manifest-{font_config.px}px.json')
+
+
+def _load_verify_manifest(font_config):
+    """
+    加载校验清单，记录每个已校验文件的大小、修改时间和内容哈希
+    以相对于项目根目录的路径为键，移动项目目录或重新克隆后仍然有效
+    """
+    manifest_file_path = _get_verify_manifest_file_path(font_config)
+    if not os.path.isfile(manifest_file_path):
+        return {}
+    try:
+        with open(manifest_file_path, 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        logger.warning(f'ignore broken verify manifest {manifest_file_path}')
+        return {}
+    if manifest.get('version') != _verify_manifest_version:
+        return {}
+    return manifest['files']
+
+
+def _save_verify_manifest(font_config, manifest_files):
+    manifest_file_path = _get_verify_manifest_file_path(font_config)
+    if not os.path.exists(workspace_define.cache_dir):
+        os.makedirs(workspace_define.cache_dir)
+    manifest_file_tmp_path = f'{manifest_file_path}.tmp'
+    with open(manifest_file_tmp_path, 'w', encoding='utf-8') as file:
+        json.dump({'version': _verify_manifest_version, 'files': manifest_files}, file, indent=0, sort_keys=True)
+    os.replace(manifest_file_tmp_path, manifest_file_path)
+
+
+def _verify_design_file(font_config, design_file_path, code_point, design_file_bytes):
+    """
+    校验设计文件，返回格式化后的图片数据
+    """
+    design_data, width, height = glyph_util.decode_design_data_from_png(design_file_bytes)
+    if code_point is None:
+        code_point = -1
+        c = None
+    else:
+        c = chr(code_point)
+
+    # 校验宽度
+    east_asian_width_status = unicodedata.east_asian_width(c) if c else 'N'
+    if east_asian_width_status == 'H' or east_asian_width_status == 'Na':
+        assert width == font_config.px / 2, design_file_path
+    elif east_asian_width_status == 'F' or east_asian_width_status == 'W':
+        assert width == font_config.px, design_file_path
+    else:  # 'A' or 'N'
+        assert width == font_config.px / 2 or width == font_config.px, design_file_path
+
+    # 校验高度
+    assert height == font_config.px, design_file_path
+
+    # 校验间距
+    if 0x4E00 <= code_point <= 0x9FFF:
+        assert not design_data[0].any(), design_file_path
+        assert not design_data[:, -1].any(), design_file_path
+
+    return glyph_util.encode_design_data_to_png(design_data)
+
+
+def verify_px_design_files(font_config, design_index=None):
     """
     校验并格式化设计文件
+    大小和修改时间与校验清单一致的文件直接跳过，内容已经是标准格式的文件不会被重写
     """
-    for design_dir in configs.design_dirs:
-        design_flavor_dir = os.path.join(design_dir, f'{font_config.px}')
-        if not os.path.isdir(design_flavor_dir):
-            continue
-        for design_file_parent_dir, _, design_file_names in os.walk(design_flavor_dir):
-            for design_file_name in design_file_names:
-                if not design_file_name.endswith('.png'):
-                    continue
-                design_file_path = os.path.join(design_file_parent_dir, design_file_name)
-                design_data, width, height = glyph_util.load_design_data_from_png(design_file_path)
-                uni_hex_name, _ = _parse_design_file_name(design_file_name)
-                if uni_hex_name == 'notdef':
-                    code_point = -1
-                    c = None
-                else:
-                    code_point = int(uni_hex_name, 16)
-                    c = chr(code_point)
-
-                # 校验宽度
-                east_asian_width_status = unicodedata.east_asian_width(c) if c else 'N'
-                if east_asian_width_status == 'H' or east_asian_width_status == 'Na':
-                    assert width == font_config.px / 2, design_file_path
-                elif east_asian_width_status == 'F' or east_asian_width_status == 'W':
-                    assert width == font_config.px, design_file_path
-                else:  # 'A' or 'N'
-                    assert width == font_config.px / 2 or width == font_config.px, design_file_path
-
-                # 校验高度
-                assert height == font_config.px, design_file_path
-
-                # 校验间距
-                if 0x4E00 <= code_point <= 0x9FFF:
-                    for alpha in design_data[0]:
-                        assert alpha == 0, design_file_path
-                    for i in range(0, len(design_data)):
-                        assert design_data[i][-1] == 0, design_file_path
+    if design_index is None:
+        design_index = load_px_design_index(font_config)
+    last_manifest_files = _load_verify_manifest(font_config)
+    manifest_files = {}
+    skipped_count = 0
+    try:
+        for record in design_index.records:
+            design_file_path = record.path
+            design_file_size = record.size
+            design_file_mtime = record.mtime
+            manifest_key = os.path.relpath(design_file_path, workspace_define.project_root_dir).replace(os.sep, '/')
+            manifest_record = last_manifest_files.get(manifest_key)
+            if manifest_record is not None and manifest_record['size'] == design_file_size and manifest_record['mtime'] == design_file_mtime:
+                manifest_files[manifest_key] = manifest_record
+                skipped_count += 1
+                continue
 
+            with open(design_file_path, 'rb') as file:
+                design_file_bytes = file.read()
+            design_file_hash = hashlib.sha256(design_file_bytes).hexdigest()
+            if manifest_record is None or manifest_record['hash'] != design_file_hash:
+                formatted_design_file_bytes = _verify_design_file(font_config, design_file_path, record.code_point, design_file_bytes)
                 # 格式化设计文件
-                glyph_util.save_design_data_to_png(design_data, design_file_path)
-                logger.info(f'format design file: {design_file_path}')
+                if formatted_design_file_bytes != design_file_bytes:
+                    with open(design_file_path, 'wb') as file:
+                        file.write(formatted_design_file_bytes)
+                    design_file_stat = os.stat(design_file_path)
+                    design_file_size = design_file_stat.st_size
+                    design_file_mtime = design_file_stat.st_mtime_ns
+                    design_file_hash = hashlib.sha256(formatted_design_file_bytes).hexdigest()
+                    logger.info(f'format design file: {design_file_path}')
+                else:
+                    logger.debug(f'verify design file: {design_file_path}')
+            else:
+                skipped_count += 1
+            # 修改时间过近时不记录，下次通过内容哈希判断是否变化
+            if time.time_ns() - design_file_mtime < _racy_mtime_ns:
+                design_file_mtime = None
+            manifest_files[manifest_key] = {
+                'size': design_file_size,
+                'mtime': design_file_mtime,
+                'hash': design_file_hash,
+                'verified': True,
+            }
+    finally:
+        _save_verify_manifest(font_config, manifest_files)
+    stage_util.add_count('design_files', len(manifest_files))
+    stage_util.add_count('verified_files', len(manifest_files) - skipped_count)
+    logger.info(f'verify {font_config.px}px design files: {len(manifest_files)} files, {skipped_count} unchanged')
 
 
-def collect_px_design_files(font_config):
+def collect_px_design_files(font_config, design_index=None):
     """
     收集可用字母表，生成设计文件映射表
     """
-    # 遍历文件并分组
+    if design_index is None:
+        design_index = load_px_design_index(font_config)
+    # 按照索引分组
     alphabet = set()
     default_design_file_paths = {}
     special_design_file_paths_map = {}
-    for design_dir in configs.design_dirs:
-        design_flavor_dir = os.path.join(design_dir, f'{font_config.px}')
-        if not os.path.isdir(design_flavor_dir):
-            continue
-        for design_file_parent_dir, _, design_file_names in os.walk(design_flavor_dir):
-            for design_file_name in design_file_names:
-                if not design_file_name.endswith('.png'):
-                    continue
-                design_file_path = os.path.join(design_file_parent_dir, design_file_name)
-                uni_hex_name, language_specifics = _parse_design_file_name(design_file_name)
-                if uni_hex_name == 'notdef':
-                    default_design_file_paths['.notdef'] = design_file_path
+    for record in design_index.records:
+        if record.code_point is None:
+            default_design_file_paths['.notdef'] = record.path
+        elif len(record.language_specifics) > 0:
+            for language_specific in record.language_specifics:
+                if language_specific in special_design_file_paths_map:
+                    special_design_file_paths = special_design_file_paths_map[language_specific]
                 else:
-                    code_point = int(uni_hex_name, 16)
-                    if len(language_specifics) > 0:
-                        for language_specific in language_specifics:
-                            if language_specific in special_design_file_paths_map:
-                                special_design_file_paths = special_design_file_paths_map[language_specific]
-                            else:
-                                special_design_file_paths = {}
-                                special_design_file_paths_map[language_specific] = special_design_file_paths
-                            special_design_file_paths[code_point] = design_file_path
-                    else:
-                        default_design_file_paths[code_point] = design_file_path
-                        alphabet.add(chr(code_point))
+                    special_design_file_paths = {}
+                    special_design_file_paths_map[language_specific] = special_design_file_paths
+                special_design_file_paths[record.code_point] = record.path
+        else:
+            default_design_file_paths[record.code_point] = record.path
+            alphabet.add(chr(record.code_point))
     # 字母表排序
     alphabet = list(alphabet)
     alphabet.sort(key=lambda c: ord(c))
+    stage_util.add_count('chars', len(alphabet))
     # 合并设计文件路径组
     design_file_paths_map = {}
     for language_specific in configs.language_specifics:
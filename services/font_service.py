@@ -1,17 +1,75 @@
+import copy
+import functools
+import hashlib
 import logging
 import os.path
+import pickle
+from concurrent.futures import ProcessPoolExecutor
 
+import fontTools
 from fontTools.fontBuilder import FontBuilder
+from fontTools.misc.psCharStrings import T2CharString
 from fontTools.pens.t2CharStringPen import T2CharStringPen
 from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont, newTable
+from fontTools.ttLib.tables.BitmapGlyphMetrics import BigGlyphMetrics
+from fontTools.ttLib.tables.E_B_D_T_ import ebdt_bitmap_format_5
+from fontTools.ttLib.tables.E_B_L_C_ import SbitLineMetrics, Strike, eblc_index_sub_table_2
+from fontTools.ttLib.tables._g_l_y_f import Glyph
 
 import configs
 from configs import font_define, workspace_define
-from utils import glyph_util
+from utils import font_slice_util, glyph_util, stage_util
+
+try:
+    import cffsubr
+except ImportError:
+    cffsubr = None  # 可选依赖，CFF 子程序化需要安装
 
 logger = logging.getLogger('font-service')
 
+# 轮廓算法或缓存格式变更时需要递增，使旧的字形缓存失效
+_glyph_cache_version = 8
+
+# 网页字体分片的字符数量上限
+_font_slice_max_char_count = 500
+
+
+class _CachedBoundsT2CharString(T2CharString):
+    """
+    缓存边界，每次编译字体都会计算全部字形的边界，而计算边界会丢弃已编译的字节码
+    绘制时已经编译为字节码并记录边界，字形对象只保留字节码，不保留解码后的指令列表
+    """
+    def calcBounds(self, char_strings):
+        if not hasattr(self, 'cached_bounds'):
+            self.cached_bounds = super().calcBounds(char_strings)
+        return self.cached_bounds
+
+
+class _CachedDataGlyph(Glyph):
+    """
+    缓存编译结果，字形本身不会再被修改
+    绘制时已经编译为字节数据并记录边界和点数，字形对象不保留坐标、标志位和指令
+    """
+    def __init__(self, glyph):
+        super().__init__()
+        self.cached_data = glyph.compile(None)
+        self.numberOfContours = glyph.numberOfContours
+        self.xMin, self.yMin, self.xMax, self.yMax = glyph.xMin, glyph.yMin, glyph.xMax, glyph.yMax
+        if glyph.numberOfContours > 0:
+            self.cached_maxp_values = glyph.getMaxpValues()
+
+    def compile(self, glyf_table, recalc_bboxes=True):
+        return self.cached_data
+
+    def recalcBounds(self, glyf_table):
+        pass
+
+    def getMaxpValues(self):
+        return self.cached_maxp_values
+
 
+@functools.lru_cache(maxsize=None)
 def _get_glyph_name(code_point):
     if isinstance(code_point, int):
         return f'uni{code_point:04X}'
@@ -28,18 +86,56 @@ def _convert_point_to_open_type(point, origin_y):
     return x, y
 
 
-def _draw_glyph(design_file_path, origin_y_px, em_dot_size, is_ttf):
-    logger.info(f'draw glyph by design file {design_file_path}')
-    font_data, width, height = glyph_util.load_design_data_from_png(design_file_path)
-    outlines = glyph_util.get_outlines_from_design_data(font_data, em_dot_size)
+def _load_outlines(design_file_path, em_dot_size):
+    """
+    读取设计文件并生成轮廓，返回位图标识、打包后的轮廓、宽度和打包后的位图，返回值可序列化，供工作进程使用
+    """
+    logger.debug(f'load outlines by design file {design_file_path}')
+    design_data, width, height = glyph_util.load_design_data_from_png(design_file_path)
+    glyph_key = glyph_util.get_design_data_key(design_data)
+    outlines = glyph_util.get_outlines_from_design_data(design_data, em_dot_size)
+    return glyph_key, glyph_util.pack_outlines(outlines), width, (width, height, glyph_util.pack_design_data(design_data))
+
+
+def _load_outlines_map(design_file_paths, em_dot_size, jobs):
+    """
+    并行生成轮廓，结果与串行生成完全一致
+    """
+    if jobs <= 1 or len(design_file_paths) <= 1:
+        return {design_file_path: _load_outlines(design_file_path, em_dot_size) for design_file_path in design_file_paths}
+    chunk_size = max(1, len(design_file_paths) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = executor.map(_load_outlines, design_file_paths, [em_dot_size] * len(design_file_paths), chunksize=chunk_size)
+        return dict(zip(design_file_paths, results))
+
+
+def _get_cff_private_dict(units_per_em):
+    """
+    全角宽度作为默认宽度，字形中省略宽度，半角宽度作为基准宽度，字形中宽度编码为 0
+    字形只有全角和半角两种宽度，宽度最多占用一个字节
+    """
+    return {
+        'defaultWidthX': units_per_em,
+        'nominalWidthX': units_per_em // 2,
+    }
+
+
+def _draw_glyph(outlines, width, px, origin_y_px, em_dot_size, is_ttf):
     if is_ttf:
         pen = TTGlyphPen(None)
     else:
-        pen = T2CharStringPen(width * em_dot_size, None)
+        pen = T2CharStringPen(None, None)
+    # 轮廓只有直线，边界即全部点的范围，空字形只有原点
+    bounds = None
     if len(outlines) > 0:
         for outline_index, outline in enumerate(outlines):
             for point_index, point in enumerate(outline):
                 point = _convert_point_to_open_type(point, origin_y_px * em_dot_size)
+                x, y = point
+                if bounds is None:
+                    bounds = x, y, x, y
+                else:
+                    bounds = min(bounds[0], x), min(bounds[1], y), max(bounds[2], x), max(bounds[3], y)
                 if point_index == 0:
                     pen.moveTo(point)
                 else:
@@ -51,23 +147,143 @@ def _draw_glyph(design_file_path, origin_y_px, em_dot_size, is_ttf):
     else:
         pen.moveTo((0, 0))
         pen.closePath()
+        bounds = 0, 0, 0, 0
     advance_width = width * em_dot_size
     if is_ttf:
-        return pen.glyph(), advance_width
+        glyph = pen.glyph()
+        glyph.recalcBounds(None)
+        return _CachedDataGlyph(glyph), advance_width
     else:
-        return pen.getCharString(), advance_width
+        program = pen.getCharString().program
+        private_dict = _get_cff_private_dict(px * em_dot_size)
+        if advance_width != private_dict['defaultWidthX']:
+            program.insert(0, advance_width - private_dict['nominalWidthX'])
+        char_string = _CachedBoundsT2CharString(program=program)
+        char_string.cached_bounds = bounds
+        char_string.compile()
+        return char_string, advance_width
+
 
+def _get_design_file_hash(design_file_hashes, design_file_path):
+    if design_file_path in design_file_hashes:
+        return design_file_hashes[design_file_path]
+    with open(design_file_path, 'rb') as file:
+        design_file_hash = hashlib.sha256(file.read()).hexdigest()
+    design_file_hashes[design_file_path] = design_file_hash
+    return design_file_hash
 
-def _draw_glyphs(glyph_info_pool, design_file_paths, origin_y_px, em_dot_size, is_ttf):
+
+def _remove_stale_glyph_caches():
+    """
+    删除当前构建不会再读取的文件，包括其他缓存版本和其他 fontTools 版本的字形缓存
+    """
+    current_prefixes = f'v{_glyph_cache_version}-keys-', f'v{_glyph_cache_version}-fonttools-{fontTools.version}-'
+    for file_name in os.listdir(workspace_define.glyph_cache_dir):
+        if not file_name.startswith(current_prefixes):
+            # 多个尺寸并行构建时，文件可能已被其他进程删除
+            try:
+                os.remove(os.path.join(workspace_define.glyph_cache_dir, file_name))
+            except FileNotFoundError:
+                continue
+            logger.info(f'remove stale glyph cache {file_name}')
+
+
+def _get_glyph_key_cache_file_path(px):
+    return os.path.join(workspace_define.glyph_cache_dir, f'v{_glyph_cache_version}-keys-{px}px.pickle')
+
+
+def _load_glyph_key_cache(px):
+    """
+    加载设计文件内容哈希到位图标识和打包后的位图的映射，避免为已缓存的字形重新解码设计文件
+    """
+    cache_file_path = _get_glyph_key_cache_file_path(px)
+    if not os.path.isfile(cache_file_path):
+        return {}
+    try:
+        with open(cache_file_path, 'rb') as file:
+            return pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        logger.warning(f'ignore broken glyph key cache {cache_file_path}')
+        return {}
+
+
+def _save_glyph_key_cache(glyph_key_cache, design_file_hashes, px):
+    design_file_hash_set = set(design_file_hashes.values())
+    glyph_key_cache = {design_file_hash: design_file_info for design_file_hash, design_file_info in glyph_key_cache.items() if design_file_hash in design_file_hash_set}
+    cache_file_path = _get_glyph_key_cache_file_path(px)
+    if not os.path.exists(workspace_define.glyph_cache_dir):
+        os.makedirs(workspace_define.glyph_cache_dir)
+    _remove_stale_glyph_caches()
+    cache_file_tmp_path = f'{cache_file_path}.tmp'
+    with open(cache_file_tmp_path, 'wb') as file:
+        pickle.dump(glyph_key_cache, file, pickle.HIGHEST_PROTOCOL)
+    os.replace(cache_file_tmp_path, cache_file_path)
+
+
+def _get_glyph_cache_file_path(px, origin_y_px, em_dot_size, is_ttf):
+    return os.path.join(workspace_define.glyph_cache_dir, f'v{_glyph_cache_version}-fonttools-{fontTools.version}-{px}-{em_dot_size}-{origin_y_px}.{"ttf" if is_ttf else "otf"}.pickle')
+
+
+def _load_glyph_cache(px, origin_y_px, em_dot_size, is_ttf):
+    """
+    加载字形缓存，键为位图标识，值为序列化后的字形和步进宽度
+    """
+    cache_file_path = _get_glyph_cache_file_path(px, origin_y_px, em_dot_size, is_ttf)
+    if not os.path.isfile(cache_file_path):
+        return {}
+    try:
+        with open(cache_file_path, 'rb') as file:
+            glyph_cache = pickle.load(file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        logger.warning(f'ignore broken glyph cache {cache_file_path}')
+        return {}
+    logger.info(f'load glyph cache {cache_file_path}')
+    return glyph_cache
+
+
+def _save_glyph_cache(glyph_cache, glyph_keys, px, origin_y_px, em_dot_size, is_ttf):
+    """
+    保存字形缓存，只保留本次构建使用到的条目
+    """
+    glyph_key_set = set(glyph_keys.values())
+    glyph_cache = {glyph_key: glyph_data for glyph_key, glyph_data in glyph_cache.items() if glyph_key in glyph_key_set}
+    cache_file_path = _get_glyph_cache_file_path(px, origin_y_px, em_dot_size, is_ttf)
+    if not os.path.exists(workspace_define.glyph_cache_dir):
+        os.makedirs(workspace_define.glyph_cache_dir)
+    _remove_stale_glyph_caches()
+    cache_file_tmp_path = f'{cache_file_path}.tmp'
+    with open(cache_file_tmp_path, 'wb') as file:
+        pickle.dump(glyph_cache, file, pickle.HIGHEST_PROTOCOL)
+    os.replace(cache_file_tmp_path, cache_file_path)
+    logger.info(f'save glyph cache {cache_file_path}')
+
+
+def _draw_glyphs(glyph_info_pool, glyph_cache, glyph_keys, outline_store, design_file_paths, px, origin_y_px, em_dot_size, is_ttf):
+    """
+    字形按照位图标识共用，位图相同的设计文件只绘制一次，并且共用同一个字形对象和编译结果
+    """
     glyph_info_map = {}
+    cached_count = 0
+    drawn_count = 0
     for code_point, design_file_path in design_file_paths.items():
-        if design_file_path in glyph_info_pool:
-            glyph_info = glyph_info_pool[design_file_path]
+        glyph_key = glyph_keys[design_file_path]
+        if glyph_key in glyph_info_pool:
+            glyph_info = glyph_info_pool[glyph_key]
         else:
-            glyph_info = _draw_glyph(design_file_path, origin_y_px, em_dot_size, is_ttf)
-            glyph_info_pool[design_file_path] = glyph_info
+            # 缓存中保存的是序列化数据，反序列化得到新对象，避免被构建过程修改后写回缓存
+            if glyph_key in glyph_cache:
+                glyph_info = pickle.loads(glyph_cache[glyph_key])
+                cached_count += 1
+            else:
+                packed_outlines, width = outline_store[glyph_key]
+                glyph_info = _draw_glyph(glyph_util.unpack_outlines(packed_outlines), width, px, origin_y_px, em_dot_size, is_ttf)
+                glyph_cache[glyph_key] = pickle.dumps(glyph_info, pickle.HIGHEST_PROTOCOL)
+                drawn_count += 1
+            glyph_info_pool[glyph_key] = glyph_info
         glyph_name = _get_glyph_name(code_point)
         glyph_info_map[glyph_name] = glyph_info
+    stage_util.add_count('cached_glyphs', cached_count)
+    stage_util.add_count('drawn_glyphs', drawn_count)
     return glyph_info_map
 
 
@@ -83,7 +299,7 @@ def _create_font_builder(name_strings, units_per_em, ascent, descent, glyph_orde
         builder.setupGlyf(glyphs)
         metrics = {glyph_name: (advance_width, glyphs[glyph_name].xMin) for glyph_name, advance_width in advance_widths.items()}
     else:
-        builder.setupCFF(name_strings['psName'], {'FullName': name_strings['fullName']}, glyphs, {})
+        builder.setupCFF(name_strings['psName'], {'FullName': name_strings['fullName']}, glyphs, _get_cff_private_dict(units_per_em))
         metrics = {glyph_name: (advance_width, glyphs[glyph_name].calcBounds(None)[0]) for glyph_name, advance_width in advance_widths.items()}
     builder.setupHorizontalMetrics(metrics)
     builder.setupHorizontalHeader(ascent=ascent, descent=descent)
@@ -93,8 +309,264 @@ def _create_font_builder(name_strings, units_per_em, ascent, descent, glyph_orde
     return builder
 
 
-def make_px_fonts(font_config, alphabet, design_file_paths_map):
+def _create_sbit_line_metrics(ascent_px, descent_px, width_max):
+    line_metrics = SbitLineMetrics()
+    line_metrics.ascender = ascent_px
+    line_metrics.descender = descent_px
+    line_metrics.widthMax = width_max
+    line_metrics.caretSlopeNumerator = 1
+    line_metrics.caretSlopeDenominator = 0
+    line_metrics.caretOffset = 0
+    line_metrics.minOriginSB = 0
+    line_metrics.minAdvanceSB = 0
+    line_metrics.maxBeforeBL = ascent_px
+    line_metrics.minAfterBL = descent_px
+    line_metrics.pad1 = 0
+    line_metrics.pad2 = 0
+    return line_metrics
+
+
+def _create_bitmap_glyph_metrics(width, height, origin_y_px):
+    """
+    位图即整个字面框，左侧和顶部没有空白，步进宽度等于位图宽度
+    """
+    metrics = BigGlyphMetrics()
+    metrics.width = width
+    metrics.height = height
+    metrics.horiBearingX = 0
+    metrics.horiBearingY = origin_y_px
+    metrics.horiAdvance = width
+    metrics.vertBearingX = -(width // 2)
+    metrics.vertBearingY = 0
+    metrics.vertAdvance = height
+    return metrics
+
+
+def _setup_bitmap_strike(font, px, origin_y_px, glyph_order, bitmap_map):
+    """
+    添加 EBDT 和 EBLC 表，在原始尺寸嵌入设计文件的位图，与轮廓组成混合字体，渲染器在该尺寸下直接使用位图
+    字形按照码位排列，相邻且尺寸相同的字形合并为一个固定尺寸的索引子表，位图按照位对齐格式保存，不单独记录度量
+    """
+    strike = Strike()
+    strike_data = {}
+    index_sub_table = None
+    for glyph_name in glyph_order:
+        width, height, data = bitmap_map[glyph_name]
+        if index_sub_table is None or index_sub_table.metrics.width != width or index_sub_table.metrics.height != height:
+            index_sub_table = eblc_index_sub_table_2(None, None)
+            index_sub_table.indexFormat = 2
+            index_sub_table.imageFormat = 5
+            index_sub_table.imageSize = (width * height + 7) // 8
+            index_sub_table.metrics = _create_bitmap_glyph_metrics(width, height, origin_y_px)
+            index_sub_table.names = []
+            strike.indexSubTables.append(index_sub_table)
+        index_sub_table.names.append(glyph_name)
+        # 每个字形使用单独的对象，EBDT 按照对象合并重复数据，而固定尺寸的索引子表要求数据连续
+        strike_data[glyph_name] = ebdt_bitmap_format_5(data, None)
+
+    width_max = max(index_sub_table.metrics.width for index_sub_table in strike.indexSubTables)
+    size_table = strike.bitmapSizeTable
+    size_table.colorRef = 0
+    size_table.hori = _create_sbit_line_metrics(origin_y_px, origin_y_px - px, width_max)
+    size_table.vert = _create_sbit_line_metrics(origin_y_px, origin_y_px - px, width_max)
+    size_table.ppemX = px
+    size_table.ppemY = px
+    size_table.bitDepth = 1
+    # 水平度量
+    size_table.flags = 1
+
+    eblc_table = newTable('EBLC')
+    eblc_table.version = 2.0
+    eblc_table.strikes = [strike]
+    font['EBLC'] = eblc_table
+    ebdt_table = newTable('EBDT')
+    ebdt_table.version = 2.0
+    ebdt_table.strikeData = [strike_data]
+    font['EBDT'] = ebdt_table
+
+
+def _update_font_builder(builder, name_strings, ascent, descent, last_glyph_info_map, glyph_info_map, is_ttf):
+    """
+    在已构建的字体上派生其他语言版本，只替换有变化的字形，共用的字形和已编译的字形数据保持不变
+    """
+    font = builder.font
+    metrics = font['hmtx'].metrics
+    changed_glyph_names = [glyph_name for glyph_name, glyph_info in glyph_info_map.items() if glyph_info is not last_glyph_info_map[glyph_name]]
+    if is_ttf:
+        glyf_table = font['glyf']
+        for glyph_name in changed_glyph_names:
+            glyph, advance_width = glyph_info_map[glyph_name]
+            glyph.recalcBounds(glyf_table)
+            glyf_table[glyph_name] = glyph
+            metrics[glyph_name] = (advance_width, glyph.xMin)
+    else:
+        cff = font['CFF '].cff
+        top_dict = cff.topDictIndex[0]
+        for glyph_name in changed_glyph_names:
+            char_string, advance_width = glyph_info_map[glyph_name]
+            char_string.private = top_dict.Private
+            char_string.globalSubrs = cff.GlobalSubrs
+            top_dict.CharStrings[glyph_name] = char_string
+            metrics[glyph_name] = (advance_width, char_string.calcBounds(None)[0])
+        cff.fontNames = [name_strings['psName']]
+        top_dict.FullName = name_strings['fullName']
+    builder.setupNameTable(name_strings)
+    # 平均字符宽度依赖字形宽度，需要重新计算
+    builder.setupOS2(sTypoAscender=ascent, usWinAscent=ascent, usWinDescent=-descent)
+    return len(changed_glyph_names)
+
+
+def get_font_slices(alphabet):
+    return font_slice_util.split_alphabet(alphabet, configs.unicode_block_index, _font_slice_max_char_count)
+
+
+def _save_font_slices(font_config, language_specific, font_slices, name_strings, units_per_em, ascent, descent, glyph_info_map):
+    """
+    为每个分片单独构建 WOFF2，字形复制后使用，避免改动完整字体共用的字形对象
+    """
+    for font_slice in font_slices:
+        glyph_order = ['.notdef']
+        character_map = {}
+        for code_point in font_slice.code_points:
+            glyph_name = _get_glyph_name(code_point)
+            glyph_order.append(glyph_name)
+            character_map[code_point] = glyph_name
+        slice_glyph_info_map = {}
+        for glyph_name in glyph_order:
+            char_string, advance_width = glyph_info_map[glyph_name]
+            slice_glyph_info_map[glyph_name] = copy.copy(char_string), advance_width
+        builder = _create_font_builder(name_strings, units_per_em, ascent, descent, glyph_order, character_map, slice_glyph_info_map, False)
+        builder.font.flavor = 'woff2'
+        file_output_path = os.path.join(workspace_define.outputs_dir, font_config.get_output_font_slice_file_name(language_specific, font_slice.index))
+        builder.save(file_output_path)
+        stage_util.add_count('fonts')
+        stage_util.add_count('bytes', os.path.getsize(file_output_path))
+        logger.debug(f'make {file_output_path}')
+
+
+def _get_name_strings(font_config, language_specific):
+    output_display_name = font_config.get_output_display_name(language_specific)
+    output_unique_name = font_config.get_output_unique_name(language_specific)
+    return {
+        'copyright': font_define.copyright_string,
+        'familyName': output_display_name,
+        'styleName': font_define.style_name,
+        'uniqueFontIdentifier': f'{output_unique_name}-{font_define.style_name};{font_define.version}',
+        'fullName': output_display_name,
+        'version': font_define.version,
+        'psName': f'{output_unique_name}-{font_define.style_name}',
+        'designer': font_define.designer,
+        'description': font_define.description,
+        'vendorURL': font_define.vendor_url,
+        'designerURL': font_define.designer_url,
+        'licenseDescription': font_define.license_description,
+        'licenseInfoURL': font_define.license_info_url,
+    }
+
+
+def _load_outline_store(outline_store, design_file_paths, em_dot_size, jobs):
+    """
+    生成轮廓并以打包后的形式保存，OTF 和 TTF 共用，返回设计文件到位图标识和打包后的位图的映射
+    """
+    design_file_infos = {}
+    with stage_util.stage('load outlines'):
+        for design_file_path, (glyph_key, packed_outlines, width, bitmap) in _load_outlines_map(design_file_paths, em_dot_size, jobs).items():
+            design_file_infos[design_file_path] = glyph_key, bitmap
+            outline_store[glyph_key] = packed_outlines, width
+        stage_util.add_count('design_files', len(design_file_paths))
+    logger.info(f'load outlines of {len(design_file_paths)} design files')
+    return design_file_infos
+
+
+def _subroutinize_font_file(file_path):
+    """
+    使用 cffsubr 为 CFF 字体文件生成子程序
+    """
+    font = TTFont(file_path)
+    cffsubr.subroutinize(font)
+    font.save(file_path)
+
+
+def _make_px_format_fonts(font_config, is_ttf, glyph_order, character_map, font_slices, glyph_keys, outline_store, bitmap_store, design_file_paths_map, jobs, subroutinize):
+    """
+    生成单一格式的全部语言版本，该格式的字形缓存和字形对象在函数返回后释放
+    TTF 同时嵌入原始尺寸的位图
+    """
     units_per_em, ascent, descent = font_config.get_metrics()
+    font_format = 'ttf' if is_ttf else 'otf'
+    glyph_cache = _load_glyph_cache(font_config.px, font_config.origin_y_px, font_config.em_dot_size, is_ttf)
+    # 补充生成缓存未命中的轮廓，每个位图只需一个设计文件
+    pending_design_file_paths = {}
+    for design_file_path, glyph_key in glyph_keys.items():
+        if glyph_key not in glyph_cache and glyph_key not in outline_store:
+            pending_design_file_paths.setdefault(glyph_key, design_file_path)
+    if len(pending_design_file_paths) > 0:
+        _load_outline_store(outline_store, sorted(pending_design_file_paths.values()), font_config.em_dot_size, jobs)
+    # 先绘制全部语言版本的字形，保存缓存后即可释放，编译时不再占用内存
+    glyph_info_pool = {}
+    glyph_info_maps = {}
+    with stage_util.stage(f'draw {font_format} glyphs'):
+        for language_specific in configs.language_specifics:
+            glyph_info_maps[language_specific] = _draw_glyphs(glyph_info_pool, glyph_cache, glyph_keys, outline_store, design_file_paths_map[language_specific], font_config.px, font_config.origin_y_px, font_config.em_dot_size, is_ttf)
+    _save_glyph_cache(glyph_cache, glyph_keys, font_config.px, font_config.origin_y_px, font_config.em_dot_size, is_ttf)
+    del glyph_cache
+
+    # 各语言版本共用同一个字体，后续版本只替换有变化的字形
+    builder = None
+    last_glyph_info_map = None
+    for language_specific in configs.language_specifics:
+        name_strings = _get_name_strings(font_config, language_specific)
+        glyph_info_map = glyph_info_maps.pop(language_specific)
+        with stage_util.stage(f'compile {font_format}'):
+            if builder is None:
+                builder = _create_font_builder(name_strings, units_per_em, ascent, descent, glyph_order, character_map, glyph_info_map, is_ttf)
+            else:
+                changed_count = _update_font_builder(builder, name_strings, ascent, descent, last_glyph_info_map, glyph_info_map, is_ttf)
+                logger.info(f'derive {font_format} {language_specific} with {changed_count} changed glyphs')
+            last_glyph_info_map = glyph_info_map
+            if is_ttf:
+                bitmap_map = {_get_glyph_name(code_point): bitmap_store[glyph_keys[design_file_path]] for code_point, design_file_path in design_file_paths_map[language_specific].items()}
+                _setup_bitmap_strike(builder.font, font_config.px, font_config.origin_y_px, glyph_order, bitmap_map)
+                stage_util.add_count('bitmap_glyphs', len(glyph_order))
+            builder.font.flavor = None
+            file_output_path = os.path.join(workspace_define.outputs_dir, font_config.get_output_font_file_name(language_specific, font_format))
+            builder.save(file_output_path)
+            stage_util.add_count('fonts')
+            stage_util.add_count('bytes', os.path.getsize(file_output_path))
+        logger.info(f'make {file_output_path}')
+        if is_ttf:
+            continue
+
+        # 子程序化后的字体单独加载，不影响后续语言版本的派生
+        # WOFF2 使用未子程序化的字体，Brotli 对重复的字形数据压缩效果更好，子程序化反而使 WOFF2 增大约两成
+        if subroutinize:
+            with stage_util.stage('subroutinize otf'):
+                _subroutinize_font_file(file_output_path)
+                stage_util.add_count('bytes', os.path.getsize(file_output_path))
+            logger.info(f'subroutinize {file_output_path}')
+
+        with stage_util.stage('compile woff2'):
+            font = builder.font
+            font.flavor = 'woff2'
+            woff2_file_output_path = os.path.join(workspace_define.outputs_dir, font_config.get_output_font_file_name(language_specific, 'woff2'))
+            font.save(woff2_file_output_path)
+            stage_util.add_count('fonts')
+            stage_util.add_count('bytes', os.path.getsize(woff2_file_output_path))
+        logger.info(f'make {woff2_file_output_path}')
+
+        with stage_util.stage('compile woff2 slices'):
+            _save_font_slices(font_config, language_specific, font_slices, name_strings, units_per_em, ascent, descent, glyph_info_map)
+        logger.info(f'make {len(font_slices)} woff2 slices of {font_config.get_output_unique_name(language_specific)}')
+
+
+def make_px_fonts(font_config, alphabet, design_file_paths_map, jobs=1, subroutinize=False):
+    """
+    按照格式依次生成字体，同一时刻只保留一种格式的字形和字体，内存峰值不随格式数量增加
+    两种格式共用打包后的轮廓，只有缓存未命中时才生成
+    subroutinize 为 True 时使用 cffsubr 为 OTF 生成子程序，WOFF2 不受影响
+    """
+    assert not subroutinize or cffsubr is not None, 'subroutinize requires cffsubr'
+
     glyph_order = ['.notdef']
     character_map = {}
     for c in alphabet:
@@ -102,41 +574,34 @@ def make_px_fonts(font_config, alphabet, design_file_paths_map):
         glyph_name = _get_glyph_name(code_point)
         glyph_order.append(glyph_name)
         character_map[code_point] = glyph_name
-    otf_glyph_info_pool = {}
-    ttf_glyph_info_pool = {}
-    for language_specific in configs.language_specifics:
-        output_display_name = font_config.get_output_display_name(language_specific)
-        output_unique_name = font_config.get_output_unique_name(language_specific)
-        name_strings = {
-            'copyright': font_define.copyright_string,
-            'familyName': output_display_name,
-            'styleName': font_define.style_name,
-            'uniqueFontIdentifier': f'{output_unique_name}-{font_define.style_name};{font_define.version}',
-            'fullName': output_display_name,
-            'version': font_define.version,
-            'psName': f'{output_unique_name}-{font_define.style_name}',
-            'designer': font_define.designer,
-            'description': font_define.description,
-            'vendorURL': font_define.vendor_url,
-            'designerURL': font_define.designer_url,
-            'licenseDescription': font_define.license_description,
-            'licenseInfoURL': font_define.license_info_url,
-        }
-        design_file_paths = design_file_paths_map[language_specific]
-
-        otf_glyph_info_map = _draw_glyphs(otf_glyph_info_pool, design_file_paths, font_config.origin_y_px, font_config.em_dot_size, False)
-        otf_builder = _create_font_builder(name_strings, units_per_em, ascent, descent, glyph_order, character_map, otf_glyph_info_map, False)
-        otf_file_output_path = os.path.join(workspace_define.outputs_dir, font_config.get_output_font_file_name(language_specific, 'otf'))
-        otf_builder.save(otf_file_output_path)
-        logger.info(f'make {otf_file_output_path}')
-
-        otf_builder.font.flavor = 'woff2'
-        woff2_file_output_path = os.path.join(workspace_define.outputs_dir, font_config.get_output_font_file_name(language_specific, 'woff2'))
-        otf_builder.save(woff2_file_output_path)
-        logger.info(f'make {woff2_file_output_path}')
+    font_slices = get_font_slices(alphabet)
+
+    # 位图标识未知的设计文件需要解码，同时生成轮廓
+    design_file_hashes = {}
+    glyph_key_cache = _load_glyph_key_cache(font_config.px)
+    all_design_file_paths = sorted({design_file_path for design_file_paths in design_file_paths_map.values() for design_file_path in design_file_paths.values()})
+    pending_design_file_paths = [design_file_path for design_file_path in all_design_file_paths if _get_design_file_hash(design_file_hashes, design_file_path) not in glyph_key_cache]
+    outline_store = {}
+    for design_file_path, design_file_info in _load_outline_store(outline_store, pending_design_file_paths, font_config.em_dot_size, jobs).items():
+        glyph_key_cache[design_file_hashes[design_file_path]] = design_file_info
+    _save_glyph_key_cache(glyph_key_cache, design_file_hashes, font_config.px)
+    # 位图按照位图标识共用，用于嵌入 TTF
+    glyph_keys = {}
+    bitmap_store = {}
+    for design_file_path in all_design_file_paths:
+        glyph_key, bitmap = glyph_key_cache[design_file_hashes[design_file_path]]
+        glyph_keys[design_file_path] = glyph_key
+        bitmap_store[glyph_key] = bitmap
+    del glyph_key_cache
+
+    # 引用去重率：各语言版本引用的字形中，由共用字形提供的比例，大部分来自各语言共用同一个设计文件
+    # 位图去重率：按照设计文件路径共用之外，按照位图内容共用额外节省的比例
+    glyph_reference_count = sum(len(design_file_paths) for design_file_paths in design_file_paths_map.values())
+    unique_glyph_count = len(set(glyph_keys.values()))
+    stage_util.add_count('design_files', len(all_design_file_paths))
+    stage_util.add_count('glyph_references', glyph_reference_count)
+    stage_util.add_count('unique_glyphs', unique_glyph_count)
+    logger.info(f'pool {font_config.px}px glyphs: {len(all_design_file_paths)} design files, {unique_glyph_count} unique bitmaps, {glyph_reference_count} references, reference dedup ratio {1 - unique_glyph_count / glyph_reference_count:.2%}, bitmap dedup ratio {1 - unique_glyph_count / len(all_design_file_paths):.2%}')
 
-        ttf_glyph_info_map = _draw_glyphs(ttf_glyph_info_pool, design_file_paths, font_config.origin_y_px, font_config.em_dot_size, True)
-        ttf_builder = _create_font_builder(name_strings, units_per_em, ascent, descent, glyph_order, character_map, ttf_glyph_info_map, True)
-        ttf_file_output_path = os.path.join(workspace_define.outputs_dir, font_config.get_output_font_file_name(language_specific, 'ttf'))
-        ttf_builder.save(ttf_file_output_path)
-        logger.info(f'make {ttf_file_output_path}')
+    _make_px_format_fonts(font_config, False, glyph_order, character_map, font_slices, glyph_keys, outline_store, bitmap_store, design_file_paths_map, jobs, subroutinize)
+    _make_px_format_fonts(font_config, True, glyph_order, character_map, font_slices, glyph_keys, outline_store, bitmap_store, design_file_paths_map, jobs, subroutinize)
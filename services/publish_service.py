@@ -1,71 +1,139 @@
+import copy
+import hashlib
 import logging
 import os.path
 import shutil
 import time
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
 import git
 
 import configs
 from configs import workspace_define
+from utils import fs_util
 
 logger = logging.getLogger('publish-service')
 
 
-def make_px_release_zips(font_config):
-    for font_format in ['otf', 'woff2', 'ttf']:
-        zip_file_output_path = os.path.join(workspace_define.releases_dir, font_config.get_release_zip_file_name(font_format))
-        with zipfile.ZipFile(zip_file_output_path, 'w') as zip_file:
+_release_font_formats = ['otf', 'woff2', 'ttf']
+
+
+def _read_release_file(file_path, arc_name):
+    """
+    读取文件内容和元数据，供多个压缩包共用，ZipInfo 只作为模板，写入时复制
+    """
+    zip_info = zipfile.ZipInfo.from_file(file_path, arc_name)
+    with open(file_path, 'rb') as file:
+        data = file.read()
+    return zip_info, data
+
+
+def _get_release_checksum_file_path(zip_file_output_path):
+    return f'{os.path.splitext(zip_file_output_path)[0]}.sha256'
+
+
+def _make_release_zip(zip_file_output_path, release_files, compression, compress_level):
+    with zipfile.ZipFile(zip_file_output_path, 'w', compression=compression, compresslevel=compress_level) as zip_file:
+        for zip_info, data in release_files:
+            # writestr 会修改 ZipInfo 的偏移和校验等字段，共用的元数据需要复制后使用，否则并行写入时会互相覆盖
+            zip_file.writestr(copy.copy(zip_info), data, compress_type=compression, compresslevel=compress_level)
+    logger.info(f'make {zip_file_output_path}')
+
+    # 压缩包内每个文件的校验值，解压后可用 sha256sum -c 检查
+    checksum_file_output_path = _get_release_checksum_file_path(zip_file_output_path)
+    with open(checksum_file_output_path, 'w', encoding='utf-8') as file:
+        for zip_info, data in release_files:
+            file.write(f'{hashlib.sha256(data).hexdigest()}  {zip_info.filename}\n')
+    logger.info(f'make {checksum_file_output_path}')
+    return zip_file_output_path
+
+
+def make_release_zips(compression=zipfile.ZIP_DEFLATED, compress_level=9, max_workers=None):
+    """
+    并行生成全部尺寸和格式的发布压缩包，每个文件只读取一次
+    每个压缩包旁生成包内文件的 SHA-256 校验文件，SHA256SUMS 记录全部压缩包的校验值
+    """
+    license_file = _read_release_file('LICENSE-OFL', 'OFL.txt')
+    jobs = []
+    for font_config in configs.font_configs:
+        for font_format in _release_font_formats:
+            release_files = []
             for language_specific in configs.language_specifics:
                 font_file_name = font_config.get_output_font_file_name(language_specific, font_format)
-                font_file_path = os.path.join(workspace_define.outputs_dir, font_file_name)
-                zip_file.write(font_file_path, font_file_name)
-            zip_file.write('LICENSE-OFL', 'OFL.txt')
-        logger.info(f'make {zip_file_output_path}')
+                release_files.append(_read_release_file(os.path.join(workspace_define.outputs_dir, font_file_name), font_file_name))
+            release_files.append(license_file)
+            zip_file_output_path = os.path.join(workspace_define.releases_dir, font_config.get_release_zip_file_name(font_format))
+            jobs.append((zip_file_output_path, release_files))
+    # 压缩时会释放 GIL，使用线程即可并行
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        zip_file_output_paths = list(executor.map(lambda job: _make_release_zip(*job, compression, compress_level), jobs))
+
+    checksum_file_output_path = os.path.join(workspace_define.releases_dir, 'SHA256SUMS')
+    with open(checksum_file_output_path, 'w', encoding='utf-8') as file:
+        for zip_file_output_path in zip_file_output_paths:
+            with open(zip_file_output_path, 'rb') as zip_file:
+                checksum = hashlib.sha256(zip_file.read()).hexdigest()
+            file.write(f'{checksum}  {os.path.basename(zip_file_output_path)}\n')
+    logger.info(f'make {checksum_file_output_path}')
 
 
 def _copy_file(file_name, from_dir, to_dir):
+    """
+    文档目录受版本控制，不使用硬链接，避免之后构建改写输出文件时文档被一起修改
+    """
     from_path = os.path.join(from_dir, file_name)
     to_path = os.path.join(to_dir, file_name)
-    shutil.copy(from_path, to_path)
-    logger.info(f'copy from {from_path} to {to_path}')
+    mode = fs_util.stage_file(from_path, to_path, hardlink=False)
+    logger.info(f'{mode} from {from_path} to {to_path}')
 
 
 def copy_px_docs_files(font_config):
     file_names = [
         font_config.info_file_name,
+        font_config.info_json_file_name,
         font_config.preview_image_file_name,
     ]
     for file_name in file_names:
         _copy_file(file_name, workspace_define.outputs_dir, workspace_define.docs_dir)
 
 
-def copy_px_www_files(font_config):
-    for language_specific in configs.language_specifics:
-        file_name = font_config.get_output_font_file_name(language_specific, 'woff2')
-        _copy_file(file_name, workspace_define.outputs_dir, workspace_define.www_dir)
-    file_names = [
-        font_config.alphabet_html_file_name,
-        font_config.demo_html_file_name,
-    ]
-    for file_name in file_names:
-        _copy_file(file_name, workspace_define.outputs_dir, workspace_define.www_dir)
-
-
 def copy_docs_files():
     _copy_file('itch-io-banner.png', workspace_define.outputs_dir, workspace_define.docs_dir)
 
 
-def copy_www_files():
-    file_names = [
-        'index.html',
-        'playground.html',
-    ]
+def _get_www_file_paths_map():
+    """
+    网站目录中相对路径到源文件路径的映射
+    """
+    file_paths_map = {}
+    for file_path in fs_util.list_files(workspace_define.www_static_dir):
+        file_paths_map[file_path] = os.path.join(workspace_define.www_static_dir, file_path)
+    # 完整字体和网页使用的字体分片
+    file_names = [file_name for file_name in sorted(os.listdir(workspace_define.outputs_dir)) if file_name.endswith('.woff2')]
+    for font_config in configs.font_configs:
+        file_names.append(font_config.alphabet_html_file_name)
+        file_names.append(font_config.demo_html_file_name)
+    file_names.append('index.html')
+    file_names.append('playground.html')
     for file_name in file_names:
-        _copy_file(file_name, workspace_define.outputs_dir, workspace_define.www_dir)
+        file_paths_map[file_name] = os.path.join(workspace_define.outputs_dir, file_name)
+    return file_paths_map
+
+
+def stage_www_files():
+    """
+    对比现有的网站目录进行更新，未变化的文件使用硬链接，不再清空目录后重新复制
+    """
+    counts = fs_util.stage_dir(_get_www_file_paths_map(), workspace_define.www_dir, excludes={'.git'})
+    logger.info(f'stage {workspace_define.www_dir}: {counts}')
 
 
 def deploy_www():
+    # 网站目录不再每次清空，需要移除上次部署的仓库
+    git_dir = os.path.join(workspace_define.www_dir, '.git')
+    if os.path.exists(git_dir):
+        shutil.rmtree(git_dir)
     repo = git.Repo.init(workspace_define.www_dir)
     repo.git.add(all=True)
     repo.git.commit(m=f'deployed at {time.strftime("%Y-%m-%d %H-%M-%S")}')
@@ -73,3 +141,42 @@ def deploy_www():
     for git_deploy_config in configs.git_deploy_configs:
         repo.git.remote('add', git_deploy_config.remote_name, git_deploy_config.url)
         repo.git.push(git_deploy_config.remote_name, f'{current_branch_name}:{git_deploy_config.branch_name}', '-f')
+
+
+def _prepare_deploy_repo(git_deploy_config):
+    """
+    缓存目录中保留部署分支的本地克隆，每次部署前同步到远程分支的最新提交
+    """
+    repo_dir = os.path.join(workspace_define.cache_dir, 'www-deploy', git_deploy_config.remote_name)
+    if os.path.isdir(os.path.join(repo_dir, '.git')):
+        repo = git.Repo(repo_dir)
+        repo.git.remote('set-url', git_deploy_config.remote_name, git_deploy_config.url)
+    else:
+        repo = git.Repo.init(repo_dir)
+        repo.git.remote('add', git_deploy_config.remote_name, git_deploy_config.url)
+    remote = repo.remote(git_deploy_config.remote_name)
+    remote.fetch()
+    remote_ref_name = f'{git_deploy_config.remote_name}/{git_deploy_config.branch_name}'
+    if remote_ref_name in [ref.name for ref in remote.refs]:
+        repo.git.checkout('-f', '-B', git_deploy_config.branch_name, remote_ref_name)
+    else:
+        # 远程分支不存在，在新分支上提交
+        repo.git.symbolic_ref('HEAD', f'refs/heads/{git_deploy_config.branch_name}')
+    repo.git.clean('-fdx')
+    return repo
+
+
+def deploy_www_incremental():
+    """
+    增量部署：按照内容摘要同步变化的文件，在已有历史上提交，只推送差异
+    """
+    for git_deploy_config in configs.git_deploy_configs:
+        repo = _prepare_deploy_repo(git_deploy_config)
+        copied_file_paths, removed_file_paths = fs_util.sync_dir(workspace_define.www_dir, repo.working_tree_dir, excludes={'.git'})
+        logger.info(f'sync {git_deploy_config.remote_name}: {len(copied_file_paths)} changed, {len(removed_file_paths)} removed')
+        repo.git.add(all=True)
+        if repo.git.status(porcelain=True) == '':
+            logger.info(f'nothing to deploy to {git_deploy_config.remote_name}')
+            continue
+        repo.git.commit(m=f'deployed at {time.strftime("%Y-%m-%d %H-%M-%S")}')
+        repo.git.push(git_deploy_config.remote_name, f'{git_deploy_config.branch_name}:{git_deploy_config.branch_name}')
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import TimeoutError
+
+import build
+import configs
+from configs import workspace_define
+from services import info_service
+
+
+def _make_px_html_files(outputs_dir, font_config, alphabet):
+    """
+    在构建进程中执行单个尺寸的网页阶段，输出到临时目录
+    """
+    workspace_define.outputs_dir = outputs_dir
+    info_service.make_px_alphabet_html_file(font_config, alphabet)
+    info_service.make_px_demo_html_file(font_config, alphabet)
+    return sorted(os.listdir(outputs_dir))
+
+
+class ChainExecutorTestCase(unittest.TestCase):
+    """
+    构建进程中压缩网页不能死锁
+    """
+    timeout = 120
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_make_px_html_files(self):
+        font_config = configs.font_configs[0]
+        alphabet = sorted(set('ABCabc0123，。方舟像素字体'))
+        executor = build._create_chain_executor(1)
+        future = executor.submit(_make_px_html_files, self.temp_dir.name, font_config, alphabet)
+        try:
+            file_names = future.result(timeout=self.timeout)
+        except TimeoutError:
+            # 死锁时终止子进程，避免测试本身无法退出
+            for process in list(executor._processes.values()):
+                process.terminate()
+            raise
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        self.assertEqual(file_names, sorted([font_config.alphabet_html_file_name, font_config.demo_html_file_name]))
@@ -0,0 +1,48 @@
+import json
+import os
+import platform
+import tempfile
+import unittest
+
+from configs import workspace_define
+from configs.charset_config import CharsetConfig
+from services import coverage_service
+from utils import gb2312_util
+
+
+class CharsetCacheTestCase(unittest.TestCase):
+    """
+    字符集配置变化后不能继续使用旧的缓存
+    """
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.old_cache_dir = workspace_define.cache_dir
+        workspace_define.cache_dir = self.temp_dir.name
+        self.charset_config = CharsetConfig('gb2312', 'GB2312', '', gb2312_util.query_block, [
+            ('level-1', '一级汉字', gb2312_util.alphabet_level_1_count),
+        ])
+
+    def tearDown(self):
+        workspace_define.cache_dir = self.old_cache_dir
+        self.temp_dir.cleanup()
+
+    def write_cache(self, config_hash, code_points_map):
+        cache_file_path = coverage_service._get_charset_cache_file_path(self.charset_config)
+        os.makedirs(os.path.dirname(cache_file_path), exist_ok=True)
+        with open(cache_file_path, 'w', encoding='utf-8') as file:
+            json.dump({'version': coverage_service._charset_cache_version, 'python': platform.python_version(), 'config': config_hash, 'blocks': code_points_map}, file)
+
+    def test_same_config(self):
+        code_points_map = {'level-1': [0x4E00]}
+        self.write_cache(coverage_service._get_charset_config_hash(self.charset_config), code_points_map)
+        self.assertEqual(coverage_service._load_charset_code_points_map(self.charset_config), code_points_map)
+
+    def test_changed_config(self):
+        changed_charset_config = CharsetConfig('gb2312', 'GB2312', '', gb2312_util.query_block, [
+            ('level-1', '一级汉字', gb2312_util.alphabet_level_1_count),
+            ('level-2', '二级汉字', gb2312_util.alphabet_level_2_count),
+        ])
+        self.assertNotEqual(coverage_service._get_charset_config_hash(changed_charset_config), coverage_service._get_charset_config_hash(self.charset_config))
+        self.write_cache(coverage_service._get_charset_config_hash(changed_charset_config), {'level-1': [0x4E00]})
+        code_points_map = coverage_service._load_charset_code_points_map(self.charset_config)
+        self.assertEqual(sum(len(code_points) for code_points in code_points_map.values()), gb2312_util.alphabet_count)
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import fontTools
+
+import configs
+from configs import workspace_define
+from services import font_service
+
+
+class RemoveStaleGlyphCachesTestCase(unittest.TestCase):
+    """
+    只保留当前缓存版本和当前 fontTools 版本的字形缓存
+    """
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.old_glyph_cache_dir = workspace_define.glyph_cache_dir
+        workspace_define.glyph_cache_dir = self.temp_dir.name
+
+    def tearDown(self):
+        workspace_define.glyph_cache_dir = self.old_glyph_cache_dir
+        self.temp_dir.cleanup()
+
+    def test_remove_stale_glyph_caches(self):
+        version = font_service._glyph_cache_version
+        current_file_paths = [
+            font_service._get_glyph_key_cache_file_path(12),
+            font_service._get_glyph_cache_file_path(12, 10, 100, True),
+            font_service._get_glyph_cache_file_path(12, 10, 100, False),
+        ]
+        stale_file_paths = [
+            os.path.join(workspace_define.glyph_cache_dir, f'v{version - 1}-keys-12px.pickle'),
+            os.path.join(workspace_define.glyph_cache_dir, f'v{version}-fonttools-0.0.0-12-100-10.ttf.pickle'),
+            os.path.join(workspace_define.glyph_cache_dir, f'v{version}-fonttools-{fontTools.version}.old-12-100-10.otf.pickle'),
+        ]
+        for file_path in current_file_paths + stale_file_paths:
+            with open(file_path, 'wb'):
+                pass
+        font_service._remove_stale_glyph_caches()
+        for file_path in current_file_paths:
+            self.assertTrue(os.path.isfile(file_path), file_path)
+        for file_path in stale_file_paths:
+            self.assertFalse(os.path.exists(file_path), file_path)
+
+
+class ParallelOutlinesTestCase(unittest.TestCase):
+    """
+    并行生成轮廓编译出的字体与串行生成的逐字节一致
+    """
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.old_outputs_dir = workspace_define.outputs_dir
+        self.old_glyph_cache_dir = workspace_define.glyph_cache_dir
+        self.font_config = configs.font_config_map[12]
+        design_dir = os.path.join(workspace_define.design_dir, '12')
+        latin_dir = os.path.join(design_dir, '0000-007F Basic Latin')
+        punctuation_dir = os.path.join(design_dir, '2000-206F General Punctuation')
+        cjk_dir = os.path.join(design_dir, '4E00-9FFF CJK Unified Ideographs', '4E-')
+        default_design_file_paths = {
+            '.notdef': os.path.join(design_dir, 'notdef.png'),
+            0x0020: os.path.join(latin_dir, '0020.png'),
+            0x0041: os.path.join(latin_dir, '0041.png'),
+            0x0061: os.path.join(latin_dir, '0061.png'),
+            0x2026: os.path.join(punctuation_dir, '2026.png'),
+            0x4E00: os.path.join(cjk_dir, '4E00.png'),
+            0x4E02: os.path.join(cjk_dir, '4E02.png'),
+        }
+        special_design_file_paths_map = {
+            'zh_tr': {0x4E02: os.path.join(cjk_dir, '4E02 zh_tr,ja,ko.png')},
+            'ja': {0x2026: os.path.join(punctuation_dir, '2026 ja,ko.png'), 0x4E02: os.path.join(cjk_dir, '4E02 zh_tr,ja,ko.png')},
+            'ko': {0x2026: os.path.join(punctuation_dir, '2026 ja,ko.png'), 0x4E02: os.path.join(cjk_dir, '4E02 zh_tr,ja,ko.png')},
+        }
+        self.alphabet = [chr(code_point) for code_point in sorted(code_point for code_point in default_design_file_paths if isinstance(code_point, int))]
+        self.design_file_paths_map = {}
+        for language_specific in configs.language_specifics:
+            design_file_paths = dict(default_design_file_paths)
+            design_file_paths.update(special_design_file_paths_map.get(language_specific, {}))
+            self.design_file_paths_map[language_specific] = design_file_paths
+
+    def tearDown(self):
+        workspace_define.outputs_dir = self.old_outputs_dir
+        workspace_define.glyph_cache_dir = self.old_glyph_cache_dir
+        self.temp_dir.cleanup()
+
+    def make_fonts(self, jobs):
+        """
+        每次使用独立的输出目录和字形缓存，保证轮廓都由本次生成，返回文件名到内容的映射
+        """
+        workspace_define.outputs_dir = os.path.join(self.temp_dir.name, f'outputs-{jobs}')
+        workspace_define.glyph_cache_dir = os.path.join(self.temp_dir.name, f'glyphs-{jobs}')
+        os.makedirs(workspace_define.outputs_dir)
+        # 字体头部记录编译时间，固定时间后才能逐字节比较
+        with mock.patch('time.time', return_value=1640995200):
+            font_service.make_px_fonts(self.font_config, self.alphabet, self.design_file_paths_map, jobs)
+        file_contents = {}
+        for file_name in sorted(os.listdir(workspace_define.outputs_dir)):
+            with open(os.path.join(workspace_define.outputs_dir, file_name), 'rb') as file:
+                file_contents[file_name] = file.read()
+        return file_contents
+
+    def test_make_px_fonts(self):
+        serial_file_contents = self.make_fonts(1)
+        parallel_file_contents = self.make_fonts(2)
+        self.assertEqual(sorted(parallel_file_contents.keys()), sorted(serial_file_contents.keys()))
+        for font_format in ['otf', 'ttf', 'woff2']:
+            for language_specific in configs.language_specifics:
+                self.assertIn(self.font_config.get_output_font_file_name(language_specific, font_format), serial_file_contents)
+        for file_name, content in serial_file_contents.items():
+            self.assertEqual(parallel_file_contents[file_name], content, file_name)
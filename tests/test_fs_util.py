@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+from utils import fs_util
+
+
+class StageFileTestCase(unittest.TestCase):
+    """
+    不使用硬链接放置的文件与源文件互不影响
+    """
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.from_path = os.path.join(self.temp_dir.name, 'outputs', 'file.txt')
+        self.to_path = os.path.join(self.temp_dir.name, 'docs', 'file.txt')
+        os.makedirs(os.path.dirname(self.from_path))
+        self.write_file(self.from_path, 'old')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    @staticmethod
+    def write_file(file_path, content):
+        with open(file_path, 'w', encoding='utf-8') as file:
+            file.write(content)
+
+    @staticmethod
+    def read_file(file_path):
+        with open(file_path, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def test_stage_file_without_hardlink(self):
+        self.assertIn(fs_util.stage_file(self.from_path, self.to_path, hardlink=False), ['reflink', 'copy'])
+        self.assertFalse(os.path.samefile(self.from_path, self.to_path))
+        self.write_file(self.from_path, 'new')
+        self.assertEqual(self.read_file(self.to_path), 'old')
+
+    def test_replace_hardlink(self):
+        self.assertEqual(fs_util.stage_file(self.from_path, self.to_path), 'link')
+        self.assertTrue(os.path.samefile(self.from_path, self.to_path))
+        self.assertIn(fs_util.stage_file(self.from_path, self.to_path, hardlink=False), ['reflink', 'copy'])
+        self.assertFalse(os.path.samefile(self.from_path, self.to_path))
+        self.write_file(self.from_path, 'new')
+        self.assertEqual(self.read_file(self.to_path), 'old')
@@ -0,0 +1,166 @@
+import os
+import unittest
+
+import numpy as np
+
+from configs import workspace_define
+from utils import glyph_util
+
+
+def _get_outlines_reference(design_data, dot_size):
+    """
+    重写前的轮廓算法，作为对照实现，只在测试中使用
+    """
+    # 1. 相邻像素分组
+    point_group_list = []
+    for y, design_data_row in enumerate(design_data):
+        for x, alpha in enumerate(design_data_row):
+            if alpha > 0:
+                new_point_group = {(x, y)}
+                for i, point_group in enumerate(reversed(point_group_list)):
+                    # 遍历方向为右下，因此只需检查左上
+                    if (x - 1, y) in point_group or (x, y - 1) in point_group:
+                        point_group_list.remove(point_group)
+                        new_point_group = new_point_group.union(point_group)
+                point_group_list.append(new_point_group)
+    # 2. 对每组生成轮廓
+    outlines = []
+    for point_group in point_group_list:
+        # 按照像素拆分线段，注意绘制顺序
+        pending_line_segments = []
+        for (x, y) in point_group:
+            point_outline = [
+                (x * dot_size, y * dot_size),
+                ((x + 1) * dot_size, y * dot_size),
+                ((x + 1) * dot_size, (y + 1) * dot_size),
+                (x * dot_size, (y + 1) * dot_size),
+            ]
+            # 一个像素有左右上下四个边，如果该边没有相邻像素，则该边线段有效
+            if x <= 0 or design_data[y][x - 1] <= 0:  # 左
+                pending_line_segments.append([point_outline[3], point_outline[0]])
+            if x >= len(design_data[y]) - 1 or design_data[y][x + 1] <= 0:  # 右
+                pending_line_segments.append([point_outline[1], point_outline[2]])
+            if y <= 0 or design_data[y - 1][x] <= 0:  # 上
+                pending_line_segments.append([point_outline[0], point_outline[1]])
+            if y >= len(design_data) - 1 or design_data[y + 1][x] <= 0:  # 下
+                pending_line_segments.append([point_outline[2], point_outline[3]])
+        # 连接所有的线段，注意绘制顺序
+        solved_line_segments = []
+        while len(pending_line_segments) > 0:
+            pending_line_segment = pending_line_segments.pop()
+            for i, solved_line_segment in enumerate(reversed(solved_line_segments)):
+                left_line_segment = None
+                right_line_segment = None
+                # 一共4种连接情况
+                if pending_line_segment[-1] == solved_line_segment[0]:
+                    left_line_segment = pending_line_segment
+                    right_line_segment = solved_line_segment
+                elif pending_line_segment[-1] == solved_line_segment[-1]:
+                    solved_line_segment.reverse()
+                    left_line_segment = pending_line_segment
+                    right_line_segment = solved_line_segment
+                elif solved_line_segment[-1] == pending_line_segment[0]:
+                    left_line_segment = solved_line_segment
+                    right_line_segment = pending_line_segment
+                elif solved_line_segment[-1] == pending_line_segment[-1]:
+                    pending_line_segment.reverse()
+                    left_line_segment = solved_line_segment
+                    right_line_segment = pending_line_segment
+                # 需要连接的情况
+                if left_line_segment and right_line_segment:
+                    solved_line_segments.remove(solved_line_segment)
+                    # 连接的两个点是重复的
+                    right_line_segment.pop(0)
+                    # 判断连接的点是不是可省略
+                    x, y = left_line_segment[-1]
+                    xl, yl = left_line_segment[-2]
+                    xr, yr = right_line_segment[0]
+                    if (x == xl and x == xr) or (y == yl and y == yr):
+                        left_line_segment.pop()
+                    # 连接线段
+                    pending_line_segment = left_line_segment + right_line_segment
+            solved_line_segments.append(pending_line_segment)
+        # 将连接好的线段添加到轮廓数组中，有多条线段的情况，是中间有镂空（绘制顺序与外边框相反）
+        for solved_line_segment in solved_line_segments:
+            # 首尾的两个点是重复的
+            solved_line_segment.pop(0)
+            # 判断尾点是不是可省略
+            x, y = solved_line_segment[-1]
+            xl, yl = solved_line_segment[-2]
+            xr, yr = solved_line_segment[0]
+            if (x == xl and x == xr) or (y == yl and y == yr):
+                solved_line_segment.pop()
+            # 添加到轮廓
+            outlines.append(solved_line_segment)
+    # 返回
+    return outlines
+
+
+def _get_unit_edges(outlines, dot_size):
+    """
+    将轮廓拆分为单位长度的有向边，与点的起始位置和共线点的省略方式无关
+    """
+    edges = set()
+    for outline in outlines:
+        for i, (x0, y0) in enumerate(outline):
+            x1, y1 = outline[(i + 1) % len(outline)]
+            x0, y0, x1, y1 = x0 // dot_size, y0 // dot_size, x1 // dot_size, y1 // dot_size
+            assert x0 == x1 or y0 == y1, 'outline edge must be horizontal or vertical'
+            step_x = (x1 > x0) - (x1 < x0)
+            step_y = (y1 > y0) - (y1 < y0)
+            while (x0, y0) != (x1, y1):
+                edge = (x0, y0), (x0 + step_x, y0 + step_y)
+                assert edge not in edges, 'outline edge must not repeat'
+                edges.add(edge)
+                x0 += step_x
+                y0 += step_y
+    return edges
+
+
+def _list_design_file_paths():
+    design_file_paths = []
+    for root, _, file_names in os.walk(workspace_define.design_dir):
+        for file_name in file_names:
+            if file_name.endswith('.png'):
+                design_file_paths.append(os.path.join(root, file_name))
+    design_file_paths.sort()
+    return design_file_paths
+
+
+class OutlinesTestCase(unittest.TestCase):
+    """
+    轮廓算法与重写前的实现逐个字形对照，有向边和轮廓数量都必须一致
+    """
+    dot_size = 100
+
+    def assert_same_outlines(self, design_data, message):
+        outlines = glyph_util.get_outlines_from_design_data(design_data, self.dot_size)
+        reference_outlines = _get_outlines_reference(design_data, self.dot_size)
+        self.assertEqual(len(outlines), len(reference_outlines), message)
+        self.assertEqual(_get_unit_edges(outlines, self.dot_size), _get_unit_edges(reference_outlines, self.dot_size), message)
+
+    def test_design_files(self):
+        design_file_paths = _list_design_file_paths()
+        self.assertGreater(len(design_file_paths), 0)
+        for design_file_path in design_file_paths:
+            design_data, _, _ = glyph_util.load_design_data_from_png(design_file_path)
+            self.assert_same_outlines(design_data, design_file_path)
+
+    def test_random_glyphs(self):
+        random_state = np.random.RandomState(0)
+        for i in range(3000):
+            height, width = random_state.randint(1, 17, size=2)
+            design_data = random_state.random_sample((height, width)) < random_state.uniform(0.1, 0.9)
+            self.assert_same_outlines(design_data, f'random glyph {i}')
+
+    def test_empty_glyph(self):
+        self.assertEqual(glyph_util.get_outlines_from_design_data(np.zeros((12, 12), dtype=bool), self.dot_size), [])
+
+    def test_pack_outlines(self):
+        design_data = np.random.RandomState(1).random_sample((16, 16)) < 0.5
+        outlines = glyph_util.get_outlines_from_design_data(design_data, self.dot_size)
+        self.assertEqual(glyph_util.unpack_outlines(glyph_util.pack_outlines(outlines)), outlines)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+
+from utils import html_util
+
+
+class TagNotdefTestCase(unittest.TestCase):
+    """
+    字母表以外的可打印字符被标记，标签、字符实体和不可打印字符原样保留
+    """
+    def test_tag_notdef(self):
+        notdef_pattern = html_util.compile_notdef_pattern('ab')
+        self.assertEqual(
+            html_util.tag_notdef('<p class="x">abc&amp;a\nd</p>', notdef_pattern),
+            '<p class="x">ab<span class="char-notdef">c</span>&amp;a\n<span class="char-notdef">d</span></p>',
+        )
+
+    def test_empty_alphabet(self):
+        notdef_pattern = html_util.compile_notdef_pattern('')
+        self.assertEqual(
+            html_util.tag_notdef('<p>ab\ncd</p>', notdef_pattern),
+            '<p><span class="char-notdef">ab</span>\n<span class="char-notdef">cd</span></p>',
+        )
@@ -0,0 +1,130 @@
+import hashlib
+import os
+import tempfile
+import unittest
+import zipfile
+
+import git
+import numpy as np
+
+import configs
+from configs import workspace_define
+from configs.git_deploy_config import GitDeployConfig
+from services import publish_service
+
+
+class ReleaseZipsTestCase(unittest.TestCase):
+    """
+    并行生成的发布压缩包必须完整，共用的许可证文件在每个压缩包中都能正确读出
+    """
+    rounds = 10
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.old_outputs_dir = workspace_define.outputs_dir
+        self.old_releases_dir = workspace_define.releases_dir
+        workspace_define.outputs_dir = os.path.join(self.temp_dir.name, 'outputs')
+        workspace_define.releases_dir = os.path.join(self.temp_dir.name, 'releases')
+        os.makedirs(workspace_define.outputs_dir)
+        os.makedirs(workspace_define.releases_dir)
+        # 大小不一的半随机数据，压缩耗时不同，使各线程的写入交错
+        random_state = np.random.RandomState(0)
+        self.font_file_contents = {}
+        for font_config in configs.font_configs:
+            for font_format in publish_service._release_font_formats:
+                for language_specific in configs.language_specifics:
+                    font_file_name = font_config.get_output_font_file_name(language_specific, font_format)
+                    content = random_state.randint(0, 16, random_state.randint(1, 256) * 1024, dtype=np.uint8).tobytes()
+                    with open(os.path.join(workspace_define.outputs_dir, font_file_name), 'wb') as file:
+                        file.write(content)
+                    self.font_file_contents[font_file_name] = content
+        with open(os.path.join(workspace_define.project_root_dir, 'LICENSE-OFL'), 'rb') as file:
+            self.license_content = file.read()
+
+    def tearDown(self):
+        workspace_define.outputs_dir = self.old_outputs_dir
+        workspace_define.releases_dir = self.old_releases_dir
+        self.temp_dir.cleanup()
+
+    def test_make_release_zips(self):
+        zip_count = len(configs.font_configs) * len(publish_service._release_font_formats)
+        for i in range(self.rounds):
+            publish_service.make_release_zips(max_workers=zip_count)
+            for font_config in configs.font_configs:
+                for font_format in publish_service._release_font_formats:
+                    zip_file_path = os.path.join(workspace_define.releases_dir, font_config.get_release_zip_file_name(font_format))
+                    with zipfile.ZipFile(zip_file_path) as zip_file:
+                        self.assertIsNone(zip_file.testzip(), zip_file_path)
+                        self.assertEqual(zip_file.read('OFL.txt'), self.license_content, zip_file_path)
+                        for language_specific in configs.language_specifics:
+                            font_file_name = font_config.get_output_font_file_name(language_specific, font_format)
+                            self.assertEqual(zip_file.read(font_file_name), self.font_file_contents[font_file_name], zip_file_path)
+                    with open(publish_service._get_release_checksum_file_path(zip_file_path), 'r', encoding='utf-8') as file:
+                        checksums = dict(reversed(line.split('  ', 1)) for line in file.read().splitlines())
+                    with zipfile.ZipFile(zip_file_path) as zip_file:
+                        self.assertEqual(sorted(checksums.keys()), sorted(zip_file.namelist()), zip_file_path)
+                        for arc_name, checksum in checksums.items():
+                            self.assertEqual(hashlib.sha256(zip_file.read(arc_name)).hexdigest(), checksum, zip_file_path)
+
+
+class DeployWwwIncrementalTestCase(unittest.TestCase):
+    """
+    以本地裸仓库作为远程仓库测试增量部署
+    """
+    branch_name = 'gh-pages'
+    git_env_names = ['GIT_AUTHOR_NAME', 'GIT_AUTHOR_EMAIL', 'GIT_COMMITTER_NAME', 'GIT_COMMITTER_EMAIL']
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.old_www_dir = workspace_define.www_dir
+        self.old_cache_dir = workspace_define.cache_dir
+        self.old_git_deploy_configs = configs.git_deploy_configs
+        self.old_git_envs = {name: os.environ.get(name) for name in self.git_env_names}
+        workspace_define.www_dir = os.path.join(self.temp_dir.name, 'www')
+        workspace_define.cache_dir = os.path.join(self.temp_dir.name, 'cache')
+        remote_dir = os.path.join(self.temp_dir.name, 'remote.git')
+        self.remote_repo = git.Repo.init(remote_dir, bare=True)
+        configs.git_deploy_configs = [GitDeployConfig(remote_dir, 'origin', self.branch_name)]
+        for name in self.git_env_names:
+            os.environ[name] = 'test@example.com' if name.endswith('EMAIL') else 'test'
+        os.makedirs(os.path.join(workspace_define.www_dir, 'css'))
+        self.write_www_file('index.html', 'index')
+        self.write_www_file('css/style.css', 'style')
+        self.write_www_file('font.woff2', 'font')
+
+    def tearDown(self):
+        workspace_define.www_dir = self.old_www_dir
+        workspace_define.cache_dir = self.old_cache_dir
+        configs.git_deploy_configs = self.old_git_deploy_configs
+        for name, value in self.old_git_envs.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        self.temp_dir.cleanup()
+
+    def write_www_file(self, file_path, content):
+        with open(os.path.join(workspace_define.www_dir, file_path), 'w', encoding='utf-8') as file:
+            file.write(content)
+
+    def get_remote_commit(self):
+        return self.remote_repo.commit(self.branch_name)
+
+    def test_deploy_www_incremental(self):
+        # 首次部署创建远程分支
+        publish_service.deploy_www_incremental()
+        first_commit = self.get_remote_commit()
+        self.assertEqual(first_commit.parents, ())
+        self.assertEqual(sorted(blob.path for blob in first_commit.tree.traverse() if blob.type == 'blob'), ['css/style.css', 'font.woff2', 'index.html'])
+
+        # 内容未变化时不产生新的提交
+        publish_service.deploy_www_incremental()
+        self.assertEqual(self.get_remote_commit(), first_commit)
+
+        # 只有一个文件变化时，在上次的提交上产生只包含该文件的提交
+        self.write_www_file('index.html', 'index changed')
+        publish_service.deploy_www_incremental()
+        second_commit = self.get_remote_commit()
+        self.assertEqual(second_commit.parents, (first_commit,))
+        self.assertEqual(list(second_commit.stats.files), ['index.html'])
+        self.assertEqual(second_commit.tree['index.html'].data_stream.read(), b'index changed')
@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+
+import configs
+
+
+def _count_alphabet_reference(alphabet):
+    """
+    逐个字符查询区块的统计方式，作为对照实现
+    """
+    count_map = {}
+    for c in alphabet:
+        position, unicode_block = configs.unicode_block_index.index_block(ord(c))
+        if unicode_block is not None and (c.isprintable() or unicode_block.char_count == 0):
+            count_map[position] = count_map.get(position, 0) + 1
+    return count_map
+
+
+class UnicodeBlockIndexTestCase(unittest.TestCase):
+    """
+    批量统计与逐个字符查询的结果必须一致
+    """
+    def assert_same_counts(self, alphabet):
+        visited_code_points = []
+        count_map = configs.unicode_block_index.count_alphabet(alphabet, visited_code_points.append)
+        self.assertEqual(list(count_map.keys()), sorted(count_map.keys()))
+        self.assertEqual(count_map, _count_alphabet_reference(alphabet))
+        self.assertEqual(visited_code_points, sorted(ord(c) for c in alphabet))
+
+    def test_all_code_points(self):
+        self.assert_same_counts([chr(code_point) for code_point in range(0x110000)])
+
+    def test_random_alphabets(self):
+        random_state = np.random.RandomState(0)
+        for i in range(100):
+            code_points = random_state.randint(0, 0x110000, random_state.randint(0, 2000))
+            self.assert_same_counts({chr(code_point) for code_point in code_points})
+
+    def test_empty_alphabet(self):
+        self.assertEqual(configs.unicode_block_index.count_alphabet([]), {})
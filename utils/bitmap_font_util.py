@@ -0,0 +1,87 @@
+import functools
+import math
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from utils import glyph_util
+
+
+@functools.lru_cache(maxsize=None)
+def _load_glyph_data(design_file_path, scale):
+    design_data, _, _ = glyph_util.load_design_data_from_png(design_file_path)
+    if scale != 1:
+        design_data = design_data.repeat(scale, axis=0).repeat(scale, axis=1)
+    return design_data
+
+
+class BitmapFont:
+    """
+    直接使用设计文件位图排版文本，不依赖编译后的字体文件
+    """
+    def __init__(self, design_file_paths, px, origin_y_px, scale=1, spacing=4):
+        self.design_file_paths = design_file_paths
+        self.scale = scale
+        self.size = px * scale
+        # 行距与 Pillow 多行文本一致：基线位置加上行间距
+        self.line_height = origin_y_px * scale + spacing
+
+    def get_glyph_data(self, c):
+        """
+        字符位图，缺少字形时使用 .notdef
+        """
+        design_file_path = self.design_file_paths.get(ord(c), self.design_file_paths['.notdef'])
+        return _load_glyph_data(design_file_path, self.scale)
+
+    def render_text(self, text):
+        """
+        排版文本，返回位图遮罩，支持换行
+        """
+        lines = [[self.get_glyph_data(c) for c in line] for line in text.split('\n')]
+        width = max(sum(glyph_data.shape[1] for glyph_data in line) for line in lines)
+        height = self.line_height * (len(lines) - 1) + max((glyph_data.shape[0] for glyph_data in lines[-1]), default=0)
+        mask = np.zeros((height, width), dtype=bool)
+        for i, line in enumerate(lines):
+            x = 0
+            y = self.line_height * i
+            for glyph_data in line:
+                glyph_height, glyph_width = glyph_data.shape
+                mask[y:y + glyph_height, x:x + glyph_width] |= glyph_data
+                x += glyph_width
+        return mask
+
+
+def _to_pixel(value):
+    """
+    坐标四舍五入到整像素，与 FreeType 按照小数起点光栅化的结果一致
+    """
+    return math.floor(value + 0.5)
+
+
+def blit_mask(mask, glyph_data, x, y):
+    """
+    将位图合并到遮罩的指定位置，超出遮罩范围的部分被裁剪
+    """
+    x = _to_pixel(x)
+    y = _to_pixel(y)
+    glyph_height, glyph_width = glyph_data.shape
+    mask_height, mask_width = mask.shape
+    left = max(x, 0)
+    top = max(y, 0)
+    right = min(x + glyph_width, mask_width)
+    bottom = min(y + glyph_height, mask_height)
+    if left < right and top < bottom:
+        mask[top:bottom, left:right] |= glyph_data[top - y:bottom - y, left - x:right - x]
+
+
+def draw_mask(image, xy, mask, fill):
+    """
+    按照遮罩在图片上填充颜色
+    """
+    x, y = xy
+    mask_image = Image.fromarray(mask.astype(np.uint8) * 255, 'L')
+    ImageDraw.Draw(image).bitmap((_to_pixel(x), _to_pixel(y)), mask_image, fill=fill)
+
+
+def draw_text(image, xy, text, fill, font):
+    draw_mask(image, xy, font.render_text(text), fill)
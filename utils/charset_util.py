@@ -0,0 +1,13 @@
+def build_code_points_map(query_block_func):
+    """
+    遍历全部码位，建立字符集中区块到码位列表的映射
+    编码查询开销较大，结果应当缓存
+    """
+    code_points_map = {}
+    for code_point in range(0x110000):
+        if 0xD800 <= code_point <= 0xDFFF:
+            continue  # 代理区无法编码
+        block_name = query_block_func(chr(code_point))
+        if block_name:
+            code_points_map.setdefault(block_name, []).append(code_point)
+    return code_points_map
@@ -0,0 +1,61 @@
+class FontSlice:
+    """
+    网页字体分片，浏览器按照 unicode-range 只下载页面用到的分片
+    """
+    def __init__(self, index, code_points, ranges):
+        self.index = index
+        self.code_points = code_points
+        self.ranges = ranges
+
+    @property
+    def unicode_range(self):
+        """
+        CSS unicode-range 描述
+        """
+        return ', '.join(f'U+{begin:04X}' if begin == end else f'U+{begin:04X}-{end:04X}' for begin, end in self.ranges)
+
+
+def _merge_ranges(ranges):
+    merged_ranges = []
+    for begin, end in ranges:
+        if len(merged_ranges) > 0 and merged_ranges[-1][1] + 1 == begin:
+            merged_ranges[-1] = (merged_ranges[-1][0], end)
+        else:
+            merged_ranges.append((begin, end))
+    return merged_ranges
+
+
+def split_alphabet(alphabet, unicode_block_index, max_char_count):
+    """
+    按照码位顺序以 Unicode 区块为单位切分字母表，相邻的小区块合并到同一个分片，超出上限的大区块拆分为多个分片
+    分片范围取各区块内码位的首尾，不逐个列出字符，避免 CSS 过长，各分片的范围互不重叠
+    """
+    block_groups = []
+    for code_point in sorted(ord(c) for c in alphabet):
+        position, _ = unicode_block_index.index_block(code_point)
+        if len(block_groups) == 0 or block_groups[-1][0] != position:
+            block_groups.append((position, []))
+        block_groups[-1][1].append(code_point)
+
+    font_slices = []
+    code_points = []
+    ranges = []
+
+    def flush():
+        if len(code_points) > 0:
+            font_slices.append(FontSlice(len(font_slices), list(code_points), _merge_ranges(ranges)))
+            code_points.clear()
+            ranges.clear()
+
+    for _, block_code_points in block_groups:
+        if len(code_points) + len(block_code_points) > max_char_count:
+            flush()
+        while len(block_code_points) > 0:
+            chunk = block_code_points[:max_char_count - len(code_points)]
+            block_code_points = block_code_points[len(chunk):]
+            code_points.extend(chunk)
+            ranges.append((chunk[0], chunk[-1]))
+            if len(code_points) >= max_char_count:
+                flush()
+    flush()
+    return font_slices
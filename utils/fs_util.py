@@ -0,0 +1,133 @@
+import hashlib
+import os
+import shutil
+import sys
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows 不支持，不使用写时复制
+
+# Linux ioctl FICLONE，Btrfs、XFS 等文件系统支持写时复制
+_FICLONE = 0x40049409
+
+
+def get_file_digest(file_path):
+    """
+    文件内容的 SHA-256 摘要
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_same_file_content(file_path_a, file_path_b):
+    """
+    先比较文件大小，大小一致时再比较内容摘要
+    """
+    if os.path.getsize(file_path_a) != os.path.getsize(file_path_b):
+        return False
+    return get_file_digest(file_path_a) == get_file_digest(file_path_b)
+
+
+def list_files(dir_path, excludes=()):
+    """
+    目录下全部文件的相对路径，excludes 为需要跳过的顶层文件或目录名称
+    """
+    file_paths = []
+    for root, dir_names, file_names in os.walk(dir_path):
+        if root == dir_path:
+            dir_names[:] = [dir_name for dir_name in dir_names if dir_name not in excludes]
+            file_names = [file_name for file_name in file_names if file_name not in excludes]
+        for file_name in file_names:
+            file_paths.append(os.path.relpath(os.path.join(root, file_name), dir_path))
+    return file_paths
+
+
+def sync_dir(from_dir, to_dir, excludes=()):
+    """
+    按照内容摘要同步目录，只复制有变化的文件，并删除目标目录中多余的文件
+    返回 (复制的文件列表, 删除的文件列表)
+    """
+    from_file_paths = set(list_files(from_dir, excludes))
+    copied_file_paths = []
+    for file_path in sorted(from_file_paths):
+        from_path = os.path.join(from_dir, file_path)
+        to_path = os.path.join(to_dir, file_path)
+        if os.path.isfile(to_path) and is_same_file_content(from_path, to_path):
+            continue
+        os.makedirs(os.path.dirname(to_path), exist_ok=True)
+        shutil.copyfile(from_path, to_path)
+        copied_file_paths.append(file_path)
+    removed_file_paths = []
+    for file_path in sorted(set(list_files(to_dir, excludes)) - from_file_paths):
+        os.remove(os.path.join(to_dir, file_path))
+        removed_file_paths.append(file_path)
+    return copied_file_paths, removed_file_paths
+
+
+def _reflink_file(from_path, to_path):
+    if fcntl is None or not sys.platform.startswith('linux'):
+        return False
+    with open(from_path, 'rb') as from_file, open(to_path, 'wb') as to_file:
+        try:
+            fcntl.ioctl(to_file.fileno(), _FICLONE, from_file.fileno())
+            return True
+        except OSError:
+            pass
+    os.remove(to_path)
+    return False
+
+
+def stage_file(from_path, to_path, hardlink=True):
+    """
+    将文件放置到目标位置，依次尝试硬链接、写时复制和复制，内容相同时不复制
+    硬链接与源文件共用内容，源文件被原地改写时目标文件也会改变，目标文件需要独立保存时传入 hardlink=False
+    返回使用的方式 'skip'、'link'、'reflink' 或 'copy'
+    """
+    if os.path.isfile(to_path) and os.path.samefile(from_path, to_path):
+        if hardlink:
+            return 'skip'
+        # 之前以硬链接放置的文件，需要替换为独立的副本
+        os.remove(to_path)
+    os.makedirs(os.path.dirname(to_path), exist_ok=True)
+    # 先写入临时文件再替换，避免目标文件出现不完整的状态
+    tmp_path = f'{to_path}.{os.getpid()}.tmp'
+    if hardlink:
+        try:
+            os.link(from_path, tmp_path)
+            os.replace(tmp_path, to_path)
+            return 'link'
+        except OSError:
+            pass
+    if _reflink_file(from_path, tmp_path):
+        os.replace(tmp_path, to_path)
+        return 'reflink'
+    if os.path.isfile(to_path) and is_same_file_content(from_path, to_path):
+        return 'skip'
+    shutil.copyfile(from_path, tmp_path)
+    os.replace(tmp_path, to_path)
+    return 'copy'
+
+
+def stage_dir(file_paths_map, to_dir, excludes=()):
+    """
+    按照相对路径到源文件路径的映射更新目标目录，删除映射之外的文件，而不是清空整个目录
+    返回各方式的文件数量
+    """
+    counts = {}
+    for file_path, from_path in file_paths_map.items():
+        mode = stage_file(from_path, os.path.join(to_dir, file_path))
+        counts[mode] = counts.get(mode, 0) + 1
+    if os.path.isdir(to_dir):
+        for file_path in set(list_files(to_dir, excludes)) - set(file_paths_map.keys()):
+            os.remove(os.path.join(to_dir, file_path))
+            counts['remove'] = counts.get('remove', 0) + 1
+        for root, _, _ in os.walk(to_dir, topdown=False):
+            if root == to_dir or os.path.relpath(root, to_dir).split(os.sep)[0] in excludes:
+                continue
+            if len(os.listdir(root)) == 0:
+                os.rmdir(root)
+    return counts
@@ -1,130 +1,193 @@
+import array
+import hashlib
+import io
+
+import numpy as np
 import png
 
 
+def _binarize_design_data(png_reader):
+    width, height, bitmap, info = png_reader.read()
+    bitmap = np.array(list(bitmap))
+    # 取每个像素的最后一个通道，即透明度
+    pixel_step = bitmap.shape[1] // width
+    design_data = bitmap[:, pixel_step - 1::pixel_step] > 127
+    return design_data, width, height
+
+
 def load_design_data_from_png(file_path):
     """
     从本地加载字形设计数据，并二值化
+    返回 NumPy 布尔数组，形状为 (height, width)
     """
-    width, height, bitmap, info = png.Reader(filename=file_path).read()
-    design_data = []
-    for bitmap_row in bitmap:
-        design_data_row = []
-        bitmap_row_len = len(bitmap_row)
-        pixel_step = int(bitmap_row_len / width)
-        for x in range(pixel_step - 1, bitmap_row_len, pixel_step):
-            alpha = bitmap_row[x]
-            if alpha > 127:
-                design_data_row.append(1)
-            else:
-                design_data_row.append(0)
-        design_data.append(design_data_row)
-    return design_data, width, height
+    return _binarize_design_data(png.Reader(filename=file_path))
+
+
+def decode_design_data_from_png(data):
+    """
+    从 PNG 图片数据解码字形设计数据，并二值化
+    """
+    return _binarize_design_data(png.Reader(bytes=data))
+
+
+def pack_design_data(design_data):
+    """
+    将字形设计数据逐行打包为位数据，高位在前，行末不补齐字节，与 EBDT 位对齐格式一致
+    """
+    return np.packbits(np.asarray(design_data, dtype=bool)).tobytes()
+
+
+def get_design_data_key(design_data):
+    """
+    字形位图的内容标识，位图和尺寸都相同时标识相同，与 PNG 文件的编码方式无关
+    """
+    design_data = np.asarray(design_data, dtype=bool)
+    height, width = design_data.shape
+    return hashlib.sha256(f'{width}x{height}:'.encode() + pack_design_data(design_data)).hexdigest()
+
+
+def encode_design_data_to_png(design_data):
+    """
+    编码字形设计数据，格式为 RGBA PNG 图片，颜色处为黑色
+    """
+    design_data = np.asarray(design_data, dtype=bool)
+    height, width = design_data.shape
+    bitmap = np.zeros((height, width, 4), dtype=np.uint8)
+    bitmap[:, :, 3] = design_data * 255
+    buffer = io.BytesIO()
+    png.Writer(width, height, greyscale=False, alpha=True).write(buffer, bitmap.reshape(height, -1))
+    return buffer.getvalue()
 
 
 def save_design_data_to_png(design_data, file_path):
     """
     保存字形设计数据，格式为 RGBA PNG 图片，颜色处为黑色
     """
-    bitmap = []
-    for design_data_row in design_data:
-        bitmap_row = []
-        for x in design_data_row:
-            bitmap_row.append(0)
-            bitmap_row.append(0)
-            bitmap_row.append(0)
-            if x == 0:
-                bitmap_row.append(0)
-            else:
-                bitmap_row.append(255)
-        bitmap.append(bitmap_row)
-    image = png.from_array(bitmap, 'RGBA')
-    image.save(file_path)
+    with open(file_path, 'wb') as file:
+        file.write(encode_design_data_to_png(design_data))
+
+
+# 像素上右下左四个边的起点和终点相对于像素左上角的偏移，按照顺时针方向
+_edge_offsets = [
+    ((0, 0), (1, 0)),
+    ((1, 0), (1, 1)),
+    ((1, 1), (0, 1)),
+    ((0, 1), (0, 0)),
+]
+
+
+def _find_point_group_root(point_group_parents, point):
+    root = point
+    while point_group_parents[root] != root:
+        root = point_group_parents[root]
+    # 路径压缩
+    while point_group_parents[point] != root:
+        point_group_parents[point], point = root, point_group_parents[point]
+    return root
+
+
+def _union_point_groups(point_group_parents, point_a, point_b):
+    root_a = _find_point_group_root(point_group_parents, point_a)
+    root_b = _find_point_group_root(point_group_parents, point_b)
+    if root_a != root_b:
+        point_group_parents[root_a] = root_b
 
 
 def get_outlines_from_design_data(design_data, dot_size):
     """
     轮廓算法，左上坐标系
+    外轮廓为顺时针，镂空为逆时针，时间复杂度与像素数量成线性关系
     """
-    # 1. 相邻像素分组
-    point_group_list = []
-    for y, design_data_row in enumerate(design_data):
-        for x, alpha in enumerate(design_data_row):
-            if alpha > 0:
-                new_point_group = {(x, y)}
-                for i, point_group in enumerate(reversed(point_group_list)):
-                    # 遍历方向为右下，因此只需检查左上
-                    if (x - 1, y) in point_group or (x, y - 1) in point_group:
-                        point_group_list.remove(point_group)
-                        new_point_group = new_point_group.union(point_group)
-                point_group_list.append(new_point_group)
-    # 2. 对每组生成轮廓
-    outlines = []
-    for point_group in point_group_list:
-        # 按照像素拆分线段，注意绘制顺序
-        pending_line_segments = []
-        for (x, y) in point_group:
-            point_outline = [
-                (x * dot_size, y * dot_size),
-                ((x + 1) * dot_size, y * dot_size),
-                ((x + 1) * dot_size, (y + 1) * dot_size),
-                (x * dot_size, (y + 1) * dot_size),
-            ]
-            # 一个像素有左右上下四个边，如果该边没有相邻像素，则该边线段有效
-            if x <= 0 or design_data[y][x - 1] <= 0:  # 左
-                pending_line_segments.append([point_outline[3], point_outline[0]])
-            if x >= len(design_data[y]) - 1 or design_data[y][x + 1] <= 0:  # 右
-                pending_line_segments.append([point_outline[1], point_outline[2]])
-            if y <= 0 or design_data[y - 1][x] <= 0:  # 上
-                pending_line_segments.append([point_outline[0], point_outline[1]])
-            if y >= len(design_data) - 1 or design_data[y + 1][x] <= 0:  # 下
-                pending_line_segments.append([point_outline[2], point_outline[3]])
-        # 连接所有的线段，注意绘制顺序
-        solved_line_segments = []
-        while len(pending_line_segments) > 0:
-            pending_line_segment = pending_line_segments.pop()
-            for i, solved_line_segment in enumerate(reversed(solved_line_segments)):
-                left_line_segment = None
-                right_line_segment = None
-                # 一共4种连接情况
-                if pending_line_segment[-1] == solved_line_segment[0]:
-                    left_line_segment = pending_line_segment
-                    right_line_segment = solved_line_segment
-                elif pending_line_segment[-1] == solved_line_segment[-1]:
-                    solved_line_segment.reverse()
-                    left_line_segment = pending_line_segment
-                    right_line_segment = solved_line_segment
-                elif solved_line_segment[-1] == pending_line_segment[0]:
-                    left_line_segment = solved_line_segment
-                    right_line_segment = pending_line_segment
-                elif solved_line_segment[-1] == pending_line_segment[-1]:
-                    pending_line_segment.reverse()
-                    left_line_segment = solved_line_segment
-                    right_line_segment = pending_line_segment
-                # 需要连接的情况
-                if left_line_segment and right_line_segment:
-                    solved_line_segments.remove(solved_line_segment)
-                    # 连接的两个点是重复的
-                    right_line_segment.pop(0)
-                    # 判断连接的点是不是可省略
-                    x, y = left_line_segment[-1]
-                    xl, yl = left_line_segment[-2]
-                    xr, yr = right_line_segment[0]
-                    if (x == xl and x == xr) or (y == yl and y == yr):
-                        left_line_segment.pop()
-                    # 连接线段
-                    pending_line_segment = left_line_segment + right_line_segment
-            solved_line_segments.append(pending_line_segment)
-        # 将连接好的线段添加到轮廓数组中，有多条线段的情况，是中间有镂空（绘制顺序与外边框相反）
-        for solved_line_segment in solved_line_segments:
-            # 首尾的两个点是重复的
-            solved_line_segment.pop(0)
-            # 判断尾点是不是可省略
-            x, y = solved_line_segment[-1]
-            xl, yl = solved_line_segment[-2]
-            xr, yr = solved_line_segment[0]
+    design_data = np.asarray(design_data, dtype=bool)
+    height, width = design_data.shape
+    padded_design_data = np.zeros((height + 2, width + 2), dtype=bool)
+    padded_design_data[1:-1, 1:-1] = design_data
+    # 1. 相邻像素分组（并查集），像素编号为 y * width + x，按照编号顺序遍历，因此只需检查左上
+    point_group_parents = {point: point for point in np.flatnonzero(design_data).tolist()}
+    for point in np.flatnonzero(design_data[:, 1:] & design_data[:, :-1]).tolist():
+        point = point // (width - 1) * width + point % (width - 1)
+        _union_point_groups(point_group_parents, point + 1, point)
+    for point in np.flatnonzero(design_data[1:] & design_data[:-1]).tolist():
+        _union_point_groups(point_group_parents, point + width, point)
+    # 按照分组中第一个像素的位置为分组排序
+    point_group_indices = {}
+    for point in point_group_parents:
+        root = _find_point_group_root(point_group_parents, point)
+        if root not in point_group_indices:
+            point_group_indices[root] = len(point_group_indices)
+    # 2. 收集有向边，一个像素有上右下左四个边，如果该边没有相邻像素，则该边有效，按照顺时针方向
+    # 每个像素的有效边打包为 4 位掩码，按照像素顺序排列，同一像素内按照上右下左顺序
+    edge_bits = (design_data & ~padded_design_data[:-2, 1:-1]).view(np.uint8)
+    edge_bits = edge_bits | (design_data & ~padded_design_data[1:-1, 2:]).view(np.uint8) << 1
+    edge_bits |= (design_data & ~padded_design_data[2:, 1:-1]).view(np.uint8) << 2
+    edge_bits |= (design_data & ~padded_design_data[1:-1, :-2]).view(np.uint8) << 3
+    edge_bits = edge_bits.ravel()
+    edge_points = np.flatnonzero(edge_bits)
+    edges = []
+    edge_indices_map = {}
+    for point, bits in zip(edge_points.tolist(), edge_bits[edge_points].tolist()):
+        y, x = divmod(point, width)
+        point_group_index = point_group_indices[_find_point_group_root(point_group_parents, point)]
+        for edge_type, ((sdx, sdy), (edx, edy)) in enumerate(_edge_offsets):
+            if bits >> edge_type & 1:
+                start_point = (x + sdx, y + sdy)
+                edge_indices_map.setdefault(start_point, []).append(len(edges))
+                edges.append((start_point, (x + edx, y + edy), point_group_index))
+    # 3. 沿有向边行走一次生成轮廓
+    # 两个像素对角相接时，该顶点有两条出边，优先右转，使轮廓沿着当前像素走，不会交叉
+    outlines_map = {}
+    visited = [False] * len(edges)
+    for edge_index, (_, _, point_group_index) in enumerate(edges):
+        if visited[edge_index]:
+            continue
+        points = []
+        while not visited[edge_index]:
+            visited[edge_index] = True
+            (x0, y0), (x1, y1), _ = edges[edge_index]
+            points.append((x0, y0))
+            next_edge_indices = edge_indices_map[(x1, y1)]
+            if len(next_edge_indices) == 1:
+                edge_index = next_edge_indices[0]
+            else:
+                dx, dy = x1 - x0, y1 - y0
+                right_point = (x1 - dy, y1 + dx)
+                edge_index = next(i for i in next_edge_indices if edges[i][1] == right_point)
+        # 省略共线的点
+        outline = []
+        for i, (x, y) in enumerate(points):
+            xl, yl = points[i - 1]
+            xr, yr = points[(i + 1) % len(points)]
             if (x == xl and x == xr) or (y == yl and y == yr):
-                solved_line_segment.pop()
-            # 添加到轮廓
-            outlines.append(solved_line_segment)
-    # 返回
+                continue
+            outline.append((x * dot_size, y * dot_size))
+        outlines_map.setdefault(point_group_index, []).append(outline)
+    # 按照分组顺序返回，每组中第一个为外轮廓，有多个轮廓的情况，是中间有镂空（绘制顺序与外边框相反）
+    outlines = []
+    for point_group_index in sorted(outlines_map.keys()):
+        outlines.extend(outlines_map[point_group_index])
+    return outlines
+
+
+def pack_outlines(outlines):
+    """
+    将轮廓打包为紧凑的字节数据，依次为轮廓数量、各轮廓的点数和全部点的坐标
+    """
+    values = array.array('i', [len(outlines)])
+    values.extend(len(outline) for outline in outlines)
+    for outline in outlines:
+        for x, y in outline:
+            values.append(x)
+            values.append(y)
+    return values.tobytes()
+
+
+def unpack_outlines(data):
+    values = array.array('i')
+    values.frombytes(data)
+    outline_count = values[0]
+    outlines = []
+    i = 1 + outline_count
+    for point_count in values[1:1 + outline_count]:
+        outlines.append([(values[j], values[j + 1]) for j in range(i, i + point_count * 2, 2)])
+        i += point_count * 2
     return outlines
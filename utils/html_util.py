@@ -0,0 +1,39 @@
+import itertools
+import re
+
+# 标签和字符实体原样保留，不参与字符检查
+_markup_pattern = re.compile(r'(<[^>]*>|&#?\w+;)')
+
+
+def compile_notdef_pattern(alphabet):
+    """
+    编译匹配字母表以外字符的正则表达式
+    """
+    escaped = ''.join(re.escape(c) for c in sorted(set(alphabet)))
+    if not escaped:
+        # 空字母表时所有字符都缺少字形，'[^]+' 不是合法的正则表达式
+        return re.compile(r'[\s\S]+')
+    return re.compile('[^' + escaped + ']+')
+
+
+def _wrap_notdef_text(match):
+    # 不可打印字符不需要标记，只包裹可打印的部分
+    fragments = []
+    for printable, chars in itertools.groupby(match.group(), str.isprintable):
+        text = ''.join(chars)
+        if printable:
+            fragments.append(f'<span class="char-notdef">{text}</span>')
+        else:
+            fragments.append(text)
+    return ''.join(fragments)
+
+
+def tag_notdef(html, notdef_pattern):
+    """
+    将 HTML 文本中缺少字形的字符用 char-notdef 标签包裹
+    """
+    tokens = _markup_pattern.split(html)
+    # 切分结果中偶数位置为文本，奇数位置为标签或字符实体
+    for i in range(0, len(tokens), 2):
+        tokens[i] = notdef_pattern.sub(_wrap_notdef_text, tokens[i])
+    return ''.join(tokens)
@@ -0,0 +1,182 @@
+import cProfile
+import contextlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows 不支持，不统计内存峰值
+
+logger = logging.getLogger('stage')
+
+_records = {}
+_stage_names = []
+_stage_peak_rss_list = []
+_process_peak_rss = 0
+_profile_dir = None
+
+_proc_status_file_path = '/proc/self/status'
+_proc_clear_refs_file_path = '/proc/self/clear_refs'
+
+
+def setup(profile_dir=None):
+    """
+    重置当前进程的统计记录，指定 profile_dir 时为每个顶层阶段保存 cProfile 数据
+    """
+    global _profile_dir, _process_peak_rss
+    _records.clear()
+    _stage_names.clear()
+    _stage_peak_rss_list.clear()
+    _process_peak_rss = 0
+    _profile_dir = profile_dir
+
+
+def _get_peak_rss():
+    """
+    进程启动以来的内存峰值，单位为字节
+    """
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak_rss
+    return peak_rss * 1024
+
+
+def _read_hwm():
+    """
+    Linux 下进程的内存峰值 VmHWM，单位为字节，可以通过 clear_refs 重置，其他平台返回 None
+    """
+    try:
+        with open(_proc_status_file_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_hwm():
+    """
+    将 VmHWM 重置为当前内存占用，返回是否成功
+    """
+    try:
+        with open(_proc_clear_refs_file_path, 'w', encoding='utf-8') as file:
+            file.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _update_stage_peak_rss():
+    """
+    读取重置以来的内存峰值并计入全部未结束的阶段和整个进程，重置会清除外层阶段的峰值，因此重置前需要先调用
+    """
+    global _process_peak_rss
+    hwm = _read_hwm()
+    if hwm is not None:
+        _process_peak_rss = max(_process_peak_rss, hwm)
+    for i, peak_rss in enumerate(_stage_peak_rss_list):
+        if peak_rss is not None and hwm is not None:
+            _stage_peak_rss_list[i] = max(peak_rss, hwm)
+
+
+def _get_children_cpu_time():
+    """
+    已结束的子进程消耗的 CPU 时间，用于统计工作进程
+    """
+    if resource is None:
+        return 0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+@contextlib.contextmanager
+def stage(name):
+    """
+    统计阶段的耗时、CPU 时间和内存峰值，嵌套阶段的名称包含上级阶段，同名阶段累加
+    Linux 下在阶段开始时重置 VmHWM，peak_rss 为阶段内的内存峰值，其他平台为 None
+    process_peak_rss 为进程启动以来的内存峰值
+    """
+    _stage_names.append(name)
+    full_name = ' / '.join(_stage_names)
+    record = _records.setdefault(full_name, {
+        'name': full_name,
+        'calls': 0,
+        'wall_time': 0,
+        'cpu_time': 0,
+        'peak_rss': None,
+        'process_peak_rss': None,
+        'counts': {},
+    })
+    profiler = None
+    if _profile_dir is not None and len(_stage_names) == 1:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    _update_stage_peak_rss()
+    _stage_peak_rss_list.append(_read_hwm() if _reset_hwm() else None)
+    start_wall_time = time.perf_counter()
+    start_cpu_time = time.process_time() + _get_children_cpu_time()
+    try:
+        yield
+    finally:
+        wall_time = time.perf_counter() - start_wall_time
+        cpu_time = time.process_time() + _get_children_cpu_time() - start_cpu_time
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(_profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(_profile_dir, f'{re.sub(r"[^0-9A-Za-z.]+", "-", full_name)}.prof'))
+        record['calls'] += 1
+        record['wall_time'] += wall_time
+        record['cpu_time'] += cpu_time
+        _update_stage_peak_rss()
+        stage_peak_rss = _stage_peak_rss_list.pop()
+        if stage_peak_rss is not None:
+            record['peak_rss'] = max(record['peak_rss'] or 0, stage_peak_rss)
+        # 重置 VmHWM 同时会重置 ru_maxrss，进程的内存峰值需要合并重置前读取的结果
+        process_peak_rss = _get_peak_rss()
+        record['process_peak_rss'] = max(process_peak_rss, _process_peak_rss) if process_peak_rss is not None else None
+        _stage_names.pop()
+        logger.info(f'stage {full_name} finished in {wall_time:.2f}s, cpu {cpu_time:.2f}s')
+
+
+def run_stage(name, func, *args):
+    with stage(name):
+        return func(*args)
+
+
+def add_count(name, count=1):
+    """
+    为当前阶段累加计数，例如处理的文件数和字形数
+    """
+    if len(_stage_names) == 0:
+        return
+    counts = _records[' / '.join(_stage_names)]['counts']
+    counts[name] = counts.get(name, 0) + count
+
+
+def get_records():
+    """
+    当前进程的统计记录，可序列化，用于从子进程汇总
+    """
+    return list(_records.values())
+
+
+def merge_records(records):
+    for record in records:
+        _records[record['name']] = record
+
+
+def save_report(file_path, **infos):
+    report = dict(infos)
+    report['stages'] = get_records()
+    with open(file_path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, indent=2)
+        file.write('\n')
+    logger.info(f'make {file_path}')
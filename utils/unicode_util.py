@@ -1,3 +1,4 @@
+import bisect
 import re
 
 blocks_doc_url = 'https://www.unicode.org/Public/UNIDATA/Blocks.txt'
@@ -10,11 +11,20 @@ class UnicodeBlock:
         self.begin = begin
         self.end = end
         self.capacity = end - begin + 1
-        self.char_count = 0
-        for code_point in range(begin, end + 1):
-            c = chr(code_point)
-            if c.isprintable():
-                self.char_count += 1
+        self._char_count = None
+
+    @property
+    def char_count(self):
+        """
+        区块中可打印字符的数量，遍历整个区块的开销较大，首次访问时才计算
+        """
+        if self._char_count is None:
+            self._char_count = 0
+            for code_point in range(self.begin, self.end + 1):
+                c = chr(code_point)
+                if c.isprintable():
+                    self._char_count += 1
+        return self._char_count
 
 
 def load_blocks_db(db_path):
@@ -35,8 +45,45 @@ def load_blocks_db(db_path):
     return unicode_blocks
 
 
-def index_block_by_code_point(unicode_blocks, code_point):
-    for i, unicode_block in enumerate(unicode_blocks):
-        if unicode_block.begin <= code_point <= unicode_block.end:
-            return i, unicode_block
-    return -1, None
+class UnicodeBlockIndex:
+    """
+    按照区块起始位置二分查找的区块索引
+    """
+    def __init__(self, unicode_blocks):
+        self.unicode_blocks = unicode_blocks
+        self._positions = sorted(range(len(unicode_blocks)), key=lambda i: unicode_blocks[i].begin)
+        self._begins = [unicode_blocks[i].begin for i in self._positions]
+
+    def index_block(self, code_point):
+        """
+        查询码位所在区块，返回区块序号和区块，不在任何区块中时返回 -1 和 None
+        """
+        i = bisect.bisect_right(self._begins, code_point) - 1
+        if i >= 0:
+            position = self._positions[i]
+            unicode_block = self.unicode_blocks[position]
+            if code_point <= unicode_block.end:
+                return position, unicode_block
+        return -1, None
+
+    def count_alphabet(self, alphabet, visit_code_point=None):
+        """
+        批量统计字母表在各个区块中的字符数量，返回区块序号到数量的映射，按照区块序号排序
+        不可打印字符只在区块本身没有可打印字符时计数
+        visit_code_point 在同一次遍历中按码位顺序接收每个字符的码位，供其他统计共用这次遍历
+        """
+        chars = sorted(alphabet)
+        count_map = {}
+        i = 0
+        for c in chars:
+            code_point = ord(c)
+            if visit_code_point is not None:
+                visit_code_point(code_point)
+            # 字母表已排序，区块指针只需向前移动
+            while i < len(self._begins) - 1 and self._begins[i + 1] <= code_point:
+                i += 1
+            position = self._positions[i]
+            unicode_block = self.unicode_blocks[position]
+            if self._begins[i] <= code_point <= unicode_block.end and (c.isprintable() or unicode_block.char_count == 0):
+                count_map[position] = count_map.get(position, 0) + 1
+        return {position: count_map[position] for position in sorted(count_map.keys())}